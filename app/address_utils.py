@@ -2,10 +2,14 @@ import requests
 
 from app.config import settings
 from app.utils.logging import get_logger
+from app.utils.serialization import loads
 
 logger = get_logger(__name__)
 YANDEX_API_KEY = settings.yandex_api_key
 
+# Одна HTTP-сессия на модуль: соединение с геокодером переиспользуется (keep-alive) между запросами
+_http = requests.Session()
+
 
 def geocode_address(address):
     url = "https://geocode-maps.yandex.ru/1.x/"
@@ -17,9 +21,9 @@ def geocode_address(address):
         "results": 1
     }
     try:
-        response = requests.get(url, params=params)
+        response = _http.get(url, params=params)
         response.raise_for_status()
-        data = response.json()
+        data = loads(response.content)
         feature_member = data.get("response", {}).get("GeoObjectCollection", {}).get("featureMember", [])
         if feature_member:
             addresses = []
@@ -61,9 +65,9 @@ def reverse_geocode(lat, lon):
         "results": 1
     }
     try:
-        response = requests.get(url, params=params)
+        response = _http.get(url, params=params)
         response.raise_for_status()
-        data = response.json()
+        data = loads(response.content)
         feature_member = data.get("response", {}).get("GeoObjectCollection", {}).get("featureMember", [])
         if feature_member:
             geo_object = feature_member[0]["GeoObject"]
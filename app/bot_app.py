@@ -1,12 +1,17 @@
 from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram_dialog import setup_dialogs
+from aiogram_dialog.context.media_storage import MediaIdStorage
 from app.config import settings
 from app.utils import setup_logging, get_logger, generate_default_equipment
-from app.middlewares import LoggingMiddleware
+from app.middlewares import LoggingMiddleware, SendRateLimitMiddleware, DbSessionMiddleware
 from app.utils import init_db
 from app.handlers.user.router_user import UserHandler
+from app.handlers.user.media import seed_media_ids
 from app.handlers.admin.router_admin import AdminHandler
-from app.core.database import get_session
+from app.core.database import get_session, listen_notifications
+from app.handlers.dao import COMPANY_CONTACTS_CHANNEL, invalidate_active_contact_cache
+from app.utils.serialization import loads, dumps_str
 
 
 class BotApplication:
@@ -16,9 +21,14 @@ class BotApplication:
         setup_logging()
         self.logger = get_logger(__name__)
 
-        self.bot = Bot(token=settings.telegram_token)
+        # Запросы к Bot API и ответы на них (де)сериализуются через orjson вместо стандартного json
+        session = AiohttpSession(json_loads=loads, json_dumps=dumps_str)
+        self.bot = Bot(token=settings.telegram_token, session=session)
+        self.bot.session.middleware(SendRateLimitMiddleware())
         self.dp = Dispatcher()
 
+        # Внешняя middleware: сессия открывается до фильтров, поэтому AgreePolicyFilter использует ту же сессию
+        self.dp.update.outer_middleware(DbSessionMiddleware())
         self.dp.message.middleware(LoggingMiddleware())
 
         user_router = Router()
@@ -35,17 +45,28 @@ class BotApplication:
 
         self.dp.include_router(user_router)
         self.dp.include_router(admin_router)
-        setup_dialogs(self.dp)
+        self.media_id_storage = MediaIdStorage()
+        setup_dialogs(self.dp, media_id_storage=self.media_id_storage)
         self.logger.info("Бот инициализирован")
 
     async def start(self):
         await init_db()
         async with get_session() as session:
             await generate_default_equipment(session)
-        self.logger.info("Очистка накопившихся обновлений...")
-        await self.bot.delete_webhook(drop_pending_updates=True)
-        self.logger.info("Запуск polling...")
-        await self.dp.start_polling(self.bot, skip_updates=True)
+        await seed_media_ids(self.media_id_storage, self.bot)
+        contacts_listener = None
+        try:
+            contacts_listener = await listen_notifications(COMPANY_CONTACTS_CHANNEL, invalidate_active_contact_cache)
+        except Exception as e:
+            self.logger.warning("Не удалось подписаться на изменения контактов, кэш обновляется по TTL: %s", e)
+        try:
+            self.logger.info("Очистка накопившихся обновлений...")
+            await self.bot.delete_webhook(drop_pending_updates=True)
+            self.logger.info("Запуск polling...")
+            await self.dp.start_polling(self.bot, skip_updates=True)
+        finally:
+            if contacts_listener is not None:
+                await contacts_listener.close()
 
     def register_startup(self):
         """Регистрация обработчика запуска."""
@@ -11,12 +11,19 @@ class Settings(BaseSettings):
     db_host: str = Field(default="localhost")
     db_port: str = Field(default="8000")
     db_name: str = Field(default="postgresql")
+    db_pool_size: int = Field(default=50)
+    db_max_overflow: int = Field(default=10)
+    db_pool_recycle: int = Field(default=1800)
+    db_statement_cache_size: int = Field(default=500)  # 0 — если подключение идет через PgBouncer (transaction pooling)
+    db_query_cache_size: int = Field(default=1200)
     telegram_token: str
     provider_token: str
     currency: str
     admin_root: str
     chat_id: str
     yandex_api_key: str
+    menu_photo_file_id: str | None = Field(default=None)  # file_id уже загруженного в Telegram фото меню
+    media_upload_chat_id: str | None = Field(default=None)  # Чат для однократной загрузки фото меню при старте
 
     @property
     def DB_URL(self) -> str:
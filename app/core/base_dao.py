@@ -82,6 +82,41 @@ class BaseDAO(Generic[T]):
             await self._session.rollback()
             raise
 
+    async def find_columns(
+            self,
+            columns: Sequence[Any],
+            filters: Optional[Union[BaseModel, dict]] = None,
+            order_by: Optional[Any] = None,
+    ) -> tuple[list, ...]:
+        """Возвращает значения выбранных колонок в виде отдельных списков (по одному на колонку).
+
+        В отличие от find_all не создает ORM-объекты: выбираются только нужные колонки,
+        а строки результата сразу раскладываются по колонкам через zip(*rows).
+        """
+        filter_dict = {}
+        if filters:
+            if isinstance(filters, BaseModel):
+                filter_dict = filters.model_dump(exclude_unset=True)
+            elif isinstance(filters, dict):
+                filter_dict = filters
+            else:
+                raise ValueError("Filters must be a Pydantic model or a dictionary")
+        logger.debug(f"Поиск колонок {self.model.__name__} по фильтрам: {filter_dict}")
+        try:
+            query = select(*columns).where(*[getattr(self.model, k) == v for k, v in filter_dict.items()])
+            if order_by is not None:
+                query = query.order_by(order_by)
+            result = await self._session.execute(query)
+            rows = result.all()
+            logger.debug(f"Найдено {len(rows)} записей.")
+            if not rows:
+                return tuple([] for _ in columns)
+            return tuple(list(column) for column in zip(*rows))
+        except (SQLAlchemyError, ConnectionDoesNotExistError) as e:
+            logger.error(f"Ошибка при поиске колонок по фильтрам {filter_dict}: {e}")
+            await self._session.rollback()
+            raise
+
     async def add(self, values: BaseModel):
         values_dict = values.model_dump(exclude_unset=True)
         logger.debug(f"Добавление записи {self.model.__name__} с параметрами: {values_dict}")
@@ -118,7 +153,7 @@ class BaseDAO(Generic[T]):
             filter_dict = filters
         else:
             raise ValueError("Filters must be a Pydantic model or a dictionary")
-        values_dict = values.model_dump(exclude_unset=True)
+        values_dict = values.patch() if hasattr(values, "patch") else values.model_dump(exclude_unset=True)
         logger.debug(f"Обновление записей по фильтру: {filter_dict} с параметрами: {values_dict}")
         try:
             query = (
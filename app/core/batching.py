@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_session_maker
+from app.utils.background import run_in_background
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+BatchLoader = Callable[[AsyncSession, list[int]], Awaitable[dict[int, Any]]]
+
+
+class IdBatcher:
+    """Объединяет одновременные запросы записей по id в один запрос WHERE id IN (...).
+
+    Первый вызов get() откладывает загрузку на delay секунд; все id, запрошенные за это окно,
+    загружаются одним вызовом loader в отдельной сессии. Отсутствующие id получают None.
+
+    Использование:
+        names = IdBatcher(lambda session, ids: SpecialEquipmentCategoryDAO(session).find_names(ids))
+        name = await names.get(category_id)
+    """
+
+    def __init__(self, loader: BatchLoader, delay: float = 0.01):
+        self._loader = loader
+        self._delay = delay
+        self._pending: dict[int, list[asyncio.Future]] = {}
+        self._scheduled = False
+
+    async def get(self, item_id: int) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(item_id, []).append(future)
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_later(self._delay, self._start_flush)
+        return await future
+
+    def _start_flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        run_in_background(self._flush(pending), name="id_batch_flush")
+
+    async def _flush(self, pending: dict[int, list[asyncio.Future]]) -> None:
+        logger.debug(f"Пакетная загрузка {len(pending)} id одним запросом")
+        try:
+            async with async_session_maker() as session:
+                found = await self._loader(session, list(pending))
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for item_id, futures in pending.items():
+            value = found.get(item_id)
+            for future in futures:
+                if not future.done():
+                    future.set_result(value)
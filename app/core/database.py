@@ -7,10 +7,11 @@ from sqlalchemy import func, TIMESTAMP, Integer, inspect, text
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, declared_attr
 from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine, AsyncSession
 from contextlib import asynccontextmanager
+import asyncpg
 from asyncpg.exceptions import ConnectionDoesNotExistError
 from sqlalchemy.exc import DBAPIError, PendingRollbackError
 
-from app.config import database_url
+from app.config import database_url, settings
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -19,11 +20,18 @@ logger = get_logger(__name__)
 # Создание асинхронного движка с улучшенной конфигурацией пула
 engine = create_async_engine(
     url=database_url,
-    pool_size=10,           # Максимальное количество соединений в пуле
-    max_overflow=20,        # Дополнительные соединения при переполнении
-    pool_timeout=30,        # Таймаут ожидания соединения
-    pool_recycle=300,       # Обновление соединений каждые 5 минут
-    pool_pre_ping=True      # Проверка соединений перед использованием
+    pool_size=settings.db_pool_size,          # Постоянные соединения пула (по умолчанию 50, под пиковую нагрузку)
+    max_overflow=settings.db_max_overflow,    # Дополнительные соединения при всплесках (по умолчанию 10)
+    pool_timeout=30,                          # Таймаут ожидания соединения
+    pool_recycle=settings.db_pool_recycle,    # Обновление соединений каждые 30 минут
+    pool_pre_ping=True,     # Проверка соединений перед использованием
+    insertmanyvalues_page_size=1000,  # Пакетная вставка: до 1000 строк в одном INSERT ... VALUES ... RETURNING
+    query_cache_size=settings.db_query_cache_size,  # Кэш скомпилированных SQL-выражений (по умолчанию 1200)
+    connect_args={
+        # Кэш подготовленных выражений на соединение: повторяющиеся запросы DAO не проходят разбор заново
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+    }
 )
 
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -58,10 +66,47 @@ async def get_session():
             logger.error(f"Ошибка при закрытии сессии: {str(close_err)}", exc_info=True)
 
 
+async def listen_notifications(channel: str, callback) -> asyncpg.Connection:
+    """Открывает отдельное соединение asyncpg (вне пула) и подписывает callback на NOTIFY канала.
+
+    Соединение нужно держать открытым, пока нужны уведомления, и закрыть при остановке приложения.
+    """
+    dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    listener = await asyncpg.connect(dsn)
+    await listener.add_listener(channel, callback)
+    logger.debug(f"Подписка на уведомления канала {channel} оформлена")
+    return listener
+
+
+def _find_shared_session(args, kwargs):
+    """Ищет сессию, уже открытую для обновления (DbSessionMiddleware): в kwargs или в middleware_data менеджера."""
+    session = kwargs.get("session")
+    if session is not None:
+        return session
+    for value in (*args, *kwargs.values()):
+        middleware_data = getattr(value, "middleware_data", None)
+        if isinstance(middleware_data, dict) and middleware_data.get("session") is not None:
+            return middleware_data["session"]
+    return None
+
+
 def connection(isolation_level=None):
     def decorator(method):
         @wraps(method)
         async def wrapper(*args, **kwargs):
+            if isolation_level is None:
+                shared_session = _find_shared_session(args, kwargs)
+                if shared_session is not None:
+                    kwargs["session"] = shared_session
+                    try:
+                        result = await method(*args, **kwargs)
+                        # Транзакция завершается сразу после работы с БД: иначе соединение простаивает
+                        # в транзакции до конца обновления, пока рисуется диалог и уходят сообщения
+                        await shared_session.commit()
+                        return result
+                    except Exception:
+                        await shared_session.rollback()
+                        raise
             async with get_session() as session:
                 try:
                     if isolation_level:
@@ -71,7 +116,7 @@ def connection(isolation_level=None):
                     if manager and hasattr(manager, "middleware_data"):
                         manager.middleware_data["session"] = session
 
-                    if "session" not in kwargs:
+                    if kwargs.get("session") is None:
                         kwargs["session"] = session
 
                     result = await method(*args, **kwargs)
@@ -96,6 +141,31 @@ def connection(isolation_level=None):
     return decorator
 
 
+def readonly_connection():
+    """Декоратор для обработчиков, которые только читают данные.
+
+    Вместо AsyncSession передает в kwargs["conn"] AsyncConnection в режиме AUTOCOMMIT:
+    без единицы работы ORM и без BEGIN/COMMIT вокруг единственного SELECT.
+    """
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(*args, **kwargs):
+            if "conn" in kwargs:
+                return await method(*args, **kwargs)
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                try:
+                    kwargs["conn"] = conn
+                    return await method(*args, **kwargs)
+                except (ConnectionDoesNotExistError, DBAPIError) as e:
+                    logger.error(f"Ошибка соединения в методе {method.__name__}: {str(e)}", exc_info=True)
+                    raise
+
+        return wrapper
+
+    return decorator
+
+
 class Base(AsyncAttrs, DeclarativeBase):
     __abstract__ = True
 
@@ -1,56 +1,56 @@
-from aiogram.types import Message, CallbackQuery, Update
+import logging
+
+from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 from aiogram.fsm.state import State, StatesGroup
 from aiogram_dialog import Dialog, DialogManager, Window, StartMode
 from aiogram_dialog.widgets.text import Const
 from aiogram_dialog.widgets.kbd import Button, WebApp
-from aiogram_dialog.api.exceptions import UnknownIntent
+from aiogram_dialog.api.exceptions import UnknownIntent, NoContextError
 
 from app.config import settings
 from app.core.database import get_session
 from app.handlers import BaseHandler
+from app.handlers.events import get_user_from_update, extract_message_and_callback
 from app.handlers.admin.utils import AdminFilter
 from app.handlers.dao import UserDAO, UserStatusDAO
 from app.handlers.user.router_user import MainDialogStates
-from app.utils.logging import get_logger
+from app.utils.logging import get_logger, REQUEST_LOGGER
 
 logger = get_logger(__name__)
 
+_STALE_ADMIN_TEXT = "Диалог устарел. Возвращаемся в админ-панель!"
+_STALE_RESTART_TEXT = "Диалог устарел. Начинаем заново!"
+_STALE_START_HINT_TEXT = "Диалог устарел. Пожалуйста, начните заново с команды /start."
+_RESET_ERROR_TEXT = "Произошла ошибка. Пожалуйста, начните заново с команды /start."
+
+# Фильтры не хранят состояния: один экземпляр на все регистрации команды /admin
+_ADMIN_COMMAND_FILTER = Command(commands=("admin", "админ", "Админ", "Admin"))
+_ADMIN_FILTER = AdminFilter()
+_NOT_ADMIN_FILTER = ~_ADMIN_FILTER
+
 
 class AdminDialogStates(StatesGroup):
     main = State()
     admin_menu = State()
 
 
-def get_user_from_update(event: Update):
-    if isinstance(event, Update):
-        if event.callback_query:
-            return event.callback_query.from_user
-        elif event.message:
-            return event.message.from_user
-    elif isinstance(event, CallbackQuery):
-        return event.from_user
-    elif isinstance(event, Message):
-        return event.from_user
-    return None
-
-
 async def on_admin_panel_click(callback: CallbackQuery, button: Button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user_id = dialog_manager.event.from_user.id
     logger_my.debug(f"Администратор {user_id} нажал 'Панель администратора'")
     await dialog_manager.switch_to(AdminDialogStates.admin_menu)
 
 
 async def on_back_click(callback: CallbackQuery, button: Button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user_id = callback.from_user.id
     logger_my.debug(f"Администратор {user_id} вернулся в главное меню")
     await dialog_manager.switch_to(AdminDialogStates.main)
 
 
 async def on_exit_click(callback: CallbackQuery, button: Button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user_id = callback.from_user.id
     logger_my.debug(f"Администратор {user_id} вышел из админ-меню")
     await callback.message.answer("Админ-меню закрыто. Теперь вам доступна команда /start и другие.")
@@ -70,7 +70,7 @@ def is_admin_root_sync(data, widget, manager: DialogManager) -> bool:
 
 
 async def on_grant_access_click(callback: CallbackQuery, button: Button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user_id = callback.from_user.id
     logger_my.debug(f"Супер-администратор {user_id} запросил выдачу прав администратора для себя")
 
@@ -157,99 +157,90 @@ class AdminHandler(BaseHandler):
         self.dp.include_router(self.dialog)
 
     def register_handlers(self):
-        self.dp.message(Command(commands=["admin", "админ", "Админ", "Admin"]),
-                        is_private_chat, AdminFilter())(self.admin_command)
-        self.dp.message(Command(commands=["admin", "админ", "Админ", "Admin"]), is_private_chat, ~AdminFilter())(
-            self.on_non_admin_access)
-        self.dp.message(Command(commands=["admin", "админ", "Админ", "Admin"]),
-                        is_group_chat, AdminFilter())(on_group_chat_command)
+        self.dp.message(_ADMIN_COMMAND_FILTER, is_private_chat, _ADMIN_FILTER)(self.admin_command)
+        self.dp.message(_ADMIN_COMMAND_FILTER, is_private_chat, _NOT_ADMIN_FILTER)(self.on_non_admin_access)
+        self.dp.message(_ADMIN_COMMAND_FILTER, is_group_chat, _ADMIN_FILTER)(on_group_chat_command)
 
     async def set_logger_middleware(self, handler, event, data: dict):
-        self.logger.debug("Используется обновлённая версия set_logger_middleware v2.3")
+        token = REQUEST_LOGGER.set(self.logger)
         try:
-            data["logger"] = self.logger
             return await handler(event, data)
         except UnknownIntent as e:
-            error_message = str(e)
-            intent_id = error_message.split("intent id: ")[-1] if "intent id: " in error_message else "unknown"
-            user = get_user_from_update(event)
-            user_id = user.id if user else "unknown"
-
-            # Логируем с явной обработкой Unicode
-            self.logger.debug(
-                f"Тип события: {type(event)}, содержимое: {event}".encode('utf-8', errors='replace').decode('utf-8'))
-            self.logger.warning(
-                f"Устаревший контекст для intent_id={intent_id}, пользователь={user_id}. Сбрасываем диалог."
-            )
-
-            message = None
-            if isinstance(event, Update) and event.callback_query:
-                self.logger.debug(f"Событие является Update с CallbackQuery, извлекаем сообщение")
-                message = event.callback_query.message
-            elif isinstance(event, CallbackQuery):
-                self.logger.debug(f"Событие является CallbackQuery, извлекаем сообщение")
-                message = event.message
-            else:
-                self.logger.debug(f"Событие не является CallbackQuery, редактирование сообщения невозможно")
-
-            dialog_manager = data.get("dialog_manager")
-            self.logger.debug(f"dialog_manager: {dialog_manager}")
-
-            if message:
-                self.logger.debug(f"Сообщение найдено: message_id={message.message_id}, chat_id={message.chat.id}")
-                try:
-                    await message.delete()
-                    self.logger.debug(
-                        f"Удалено сообщение для intent_id={intent_id}, пользователь={user_id}, message_id={message.message_id}"
-                    )
-                except Exception as delete_error:
-                    self.logger.warning(f"Не удалось удалить сообщение: {str(delete_error)}")
-
-            if dialog_manager:
-                try:
-                    await dialog_manager.reset_stack()
-                    dialog_manager.dialog_data.clear()
-                    if dialog_manager.current_context() and dialog_manager.current_context().state in [
-                        AdminDialogStates.main,
-                        AdminDialogStates.admin_menu
-                    ]:
-                        await dialog_manager.start(state=AdminDialogStates.main, mode=StartMode.RESET_STACK)
-                        if message:
-                            await message.answer("Диалог устарел. Возвращаемся в админ-панель!")
-                    else:
-                        await dialog_manager.start(state=MainDialogStates.action_menu, mode=StartMode.RESET_STACK)
-                        if message:
-                            await message.answer("Диалог устарел. Начинаем заново!")
-                    if isinstance(event, Update) and event.callback_query:
-                        await event.callback_query.answer()
-                    elif isinstance(event, CallbackQuery):
-                        await event.answer()
-                except Exception as reset_error:
-                    self.logger.error(f"Ошибка при сбросе диалога: {str(reset_error)}", exc_info=True)
-                    if message:
-                        await message.answer("Произошла ошибка. Пожалуйста, начните заново с команды /start.")
-                    if isinstance(event, Update) and event.callback_query:
-                        await event.callback_query.answer()
-                    elif isinstance(event, CallbackQuery):
-                        await event.answer()
-            else:
-                self.logger.warning("dialog_manager отсутствует, сброс диалога невозможен")
-                if message:
-                    await message.answer("Диалог устарел. Пожалуйста, начните заново с команды /start.")
-                if isinstance(event, Update) and event.callback_query:
-                    await event.callback_query.answer()
-                elif isinstance(event, CallbackQuery):
-                    await event.answer()
-
-            return None
+            return await self._handle_unknown_intent(event, data, e)
         except Exception as e:
             self.logger.error(f"Ошибка в middleware: {str(e)}", exc_info=True)
             raise
+        finally:
+            REQUEST_LOGGER.reset(token)
+
+    async def _handle_unknown_intent(self, event, data: dict, exc: UnknownIntent) -> None:
+        """Сбрасывает устаревший диалог: удаляет старое сообщение и возвращает пользователя в начало."""
+        log = self.logger
+        dialog_manager = data.get("dialog_manager")
+        error_message = str(exc)
+        intent_id = error_message.split("intent id: ")[-1] if "intent id: " in error_message else "unknown"
+        user = get_user_from_update(event)
+        user_id = user.id if user else "unknown"
+
+        if log.isEnabledFor(logging.DEBUG):
+            # Логируем с явной обработкой Unicode; repr всего события строится только при включенном DEBUG
+            log.debug(
+                f"Тип события: {type(event)}, содержимое: {event}".encode('utf-8', errors='replace').decode('utf-8'))
+        log.warning(
+            f"Устаревший контекст для intent_id={intent_id}, пользователь={user_id}. Сбрасываем диалог."
+        )
+
+        message, callback = extract_message_and_callback(event)
+        if callback is None:
+            log.debug(f"Событие не является CallbackQuery, редактирование сообщения невозможно")
+            message = None
+
+        log.debug("dialog_manager: %s", dialog_manager)
+
+        if message:
+            log.debug("Сообщение найдено: message_id=%s, chat_id=%s", message.message_id, message.chat.id)
+            try:
+                await message.delete()
+                log.debug("Удалено сообщение для intent_id=%s, пользователь=%s, message_id=%s",
+                          intent_id, user_id, message.message_id)
+            except Exception as delete_error:
+                log.warning(f"Не удалось удалить сообщение: {str(delete_error)}")
+
+        text = await self._reset_dialog(dialog_manager)
+        if message:
+            await message.answer(text)
+        if callback:
+            await callback.answer()
+
+        return None
+
+    async def _reset_dialog(self, dialog_manager: DialogManager | None) -> str:
+        """Перезапускает устаревший диалог и возвращает текст уведомления для пользователя.
+
+        Из админ-панели пользователь возвращается в ее начало, из остальных окон - в главное меню.
+        """
+        if not dialog_manager:
+            self.logger.warning("dialog_manager отсутствует, сброс диалога невозможен")
+            return _STALE_START_HINT_TEXT
+        try:
+            # Состояние читается до перезапуска; контекста может не быть, если intent уже не найден
+            try:
+                state = dialog_manager.current_context().state
+            except NoContextError:
+                state = None
+            # Режим RESET_STACK сам очищает стек вместе с dialog_data
+            if state in (AdminDialogStates.main, AdminDialogStates.admin_menu):
+                await dialog_manager.start(state=AdminDialogStates.main, mode=StartMode.RESET_STACK)
+                return _STALE_ADMIN_TEXT
+            await dialog_manager.start(state=MainDialogStates.action_menu, mode=StartMode.RESET_STACK)
+            return _STALE_RESTART_TEXT
+        except Exception as reset_error:
+            self.logger.error(f"Ошибка при сбросе диалога: {str(reset_error)}", exc_info=True)
+            return _RESET_ERROR_TEXT
 
     async def admin_command(self, message: Message, dialog_manager: DialogManager) -> None:
         user = message.from_user
         self.logger.debug(f"Администратор {user.id} ({user.first_name}) вызвал команду /admin")
-        dialog_manager.middleware_data["logger"] = self.logger
         await dialog_manager.start(state=AdminDialogStates.main)
 
     async def on_non_admin_access(self, message: Message) -> None:
@@ -1,14 +1,38 @@
+from datetime import datetime
+
+from asyncpg.exceptions import ConnectionDoesNotExistError
+from cachetools import TTLCache
+from sqlalchemy import select, or_, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import selectinload
 
 from app.core.base_dao import BaseDAO
 from app.handlers.models import Privacy_Policy, Special_Equipment_Category, Special_Equipment, \
     Equipment_Rental_History, Request_Status, Request, CompanyContact, PaymentTransaction, User, UserStatus
-from app.handlers.schemas import RequestStatusBase, RequestCreate, SpecialEquipmentIdFilterName, CompanyContactFilter, \
-    TelegramIDModel
+from app.handlers.schemas import RequestStatusBase, RequestCreate, CompanyContactRead
 from app.utils import get_logger
 
 logger = get_logger(__name__)
 
+# Канал NOTIFY, в который триггер на company_contacts сообщает об изменениях (см. app/utils/create_table_db.py)
+COMPANY_CONTACTS_CHANNEL = "company_contacts_changed"
+
+# Активная контактная информация меняется редко (через админ-панель), а читается при каждом открытии окна
+# контактов. TTL ограничивает устаревание, если уведомление об изменении не дошло. В кэше хранится
+# снимок CompanyContactRead, а не ORM-объект: тот привязан к закрытой сессии и не должен переживать запрос.
+_ACTIVE_CONTACT_KEY = "active"
+_active_contact_cache: TTLCache = TTLCache(maxsize=1, ttl=600)
+
+
+def invalidate_active_contact_cache(*_) -> None:
+    """Сбрасывает кэш активной контактной информации.
+
+    Сигнатура совместима с обработчиком asyncpg add_listener (connection, pid, channel, payload).
+    """
+    _active_contact_cache.clear()
+    logger.debug("Кэш активной контактной информации сброшен")
+
 
 class PrivacyPolicyDAO(BaseDAO[Privacy_Policy]):
     model = Privacy_Policy
@@ -28,6 +52,18 @@ class SpecialEquipmentCategoryDAO(BaseDAO[Special_Equipment_Category]):
     """
     model = Special_Equipment_Category
 
+    async def find_names(self, category_ids: list[int]) -> dict[int, str]:
+        """Названия категорий по списку id одним запросом WHERE id IN (...)."""
+        logger.debug(f"Поиск названий категорий: {category_ids}")
+        try:
+            query = select(self.model.id, self.model.name).where(self.model.id.in_(category_ids))
+            result = await self._session.execute(query)
+            return dict(result.tuples().all())
+        except (SQLAlchemyError, ConnectionDoesNotExistError) as e:
+            logger.error(f"Ошибка при поиске названий категорий {category_ids}: {e}")
+            await self._session.rollback()
+            raise
+
 
 class SpecialEquipmentDAO(BaseDAO[Special_Equipment]):
     """Объект доступа к данным (DAO) для управления записями SpecialEquipment.
@@ -49,9 +85,43 @@ class SpecialEquipmentDAO(BaseDAO[Special_Equipment]):
 
     async def find_by_name(self, name: str) -> Special_Equipment | None:
         """Найти оборудование по имени."""
-        filters = SpecialEquipmentIdFilterName(name=name)
+        filters = {"name": name}
         return await self.find_one_or_none(filters)
 
+    async def find_card(self, equipment_id: int) -> dict | None:
+        """Поля карточки техники одним SELECT без создания ORM-объекта.
+
+        Цена возвращается как float, чтобы словарь можно было передать в start_data диалога.
+        """
+        return (await self.find_cards([equipment_id])).get(equipment_id)
+
+    async def find_cards(self, equipment_ids: list[int]) -> dict[int, dict]:
+        """Карточки техники по списку id одним запросом WHERE id IN (...), см. find_card."""
+        logger.debug(f"Поиск карточек техники id={equipment_ids}")
+        try:
+            query = (
+                select(
+                    self.model.id,
+                    self.model.name,
+                    self.model.rental_price_per_day,
+                    self.model.description,
+                    self.model.image_path,
+                    self.model.category_id,
+                )
+                .where(self.model.id.in_(equipment_ids))
+            )
+            result = await self._session.execute(query)
+            cards = {}
+            for row in result:
+                card = row._asdict()
+                card["rental_price_per_day"] = float(card["rental_price_per_day"])
+                cards[card.pop("id")] = card
+            return cards
+        except (SQLAlchemyError, ConnectionDoesNotExistError) as e:
+            logger.error(f"Ошибка при поиске карточек техники id={equipment_ids}: {e}")
+            await self._session.rollback()
+            raise
+
 
 class EquipmentRentalHistoryDAO(BaseDAO[Equipment_Rental_History]):
     """Объект доступа к данным (DAO) для управления записями EquipmentRentalHistory.
@@ -71,6 +141,30 @@ class EquipmentRentalHistoryDAO(BaseDAO[Equipment_Rental_History]):
     """
     model = Equipment_Rental_History
 
+    async def find_periods(self, equipment_id: int, start_date: datetime, end_date: datetime) -> tuple[list, list]:
+        """Периоды аренды техники, пересекающиеся с диапазоном дат, в виде (start_dates, end_dates)."""
+        logger.debug(f"Поиск периодов аренды equipment_id={equipment_id} в диапазоне {start_date} - {end_date}")
+        try:
+            query = (
+                select(self.model.start_date, self.model.end_date)
+                .where(
+                    self.model.equipment_id == equipment_id,
+                    self.model.start_date <= end_date,
+                    or_(self.model.end_date.is_(None), self.model.end_date >= start_date),
+                )
+            )
+            result = await self._session.execute(query)
+            rows = result.all()
+            logger.debug(f"Найдено {len(rows)} периодов аренды.")
+            if not rows:
+                return [], []
+            starts, ends = zip(*rows)
+            return list(starts), list(ends)
+        except (SQLAlchemyError, ConnectionDoesNotExistError) as e:
+            logger.error(f"Ошибка при поиске периодов аренды equipment_id={equipment_id}: {e}")
+            await self._session.rollback()
+            raise
+
 
 class RequestStatusDAO(BaseDAO[Request_Status]):
     """Объект доступа к данным (DAO) для управления записями Request_Status."""
@@ -98,6 +192,54 @@ class RequestDAO(BaseDAO[Request]):
             raise
         return new_instance
 
+    async def create_with_rental(self, values: 'RequestCreate') -> int:
+        """Создает заявку и запись истории аренды двумя INSERT ... SELECT без предварительных выборок.
+
+        Цена аренды берется из спецтехники, статус 'Новая' - из справочника прямо в запросах.
+        Возвращает id заявки; если техника или статус не найдены, поднимает ValueError.
+        Фиксация транзакции остается за вызывающим кодом.
+        """
+        values_dict = values.model_dump(exclude_unset=True)
+        equipment_name = values_dict["equipment_name"]
+        logger.debug(f"Создание заявки с историей аренды: {values_dict}")
+        try:
+            equipment_query = (
+                select(
+                    Special_Equipment.id,
+                    literal(values_dict["selected_date"], Equipment_Rental_History.start_date.type),
+                    Special_Equipment.rental_price_per_day,
+                )
+                .where(Special_Equipment.name == equipment_name)
+            )
+            history_query = (
+                insert(Equipment_Rental_History)
+                .from_select(["equipment_id", "start_date", "rental_price_at_time"], equipment_query)
+                .returning(Equipment_Rental_History.id)
+            )
+            if (await self._session.execute(history_query)).scalar_one_or_none() is None:
+                raise ValueError(f"Спецтехника с именем '{equipment_name}' не найдено")
+
+            columns = list(values_dict)
+            status_query = (
+                select(*[literal(values_dict[name], getattr(self.model, name).type) for name in columns],
+                       Request_Status.id)
+                .where(Request_Status.name == "Новая")
+            )
+            request_query = (
+                insert(self.model)
+                .from_select([*columns, "status_id"], status_query)
+                .returning(self.model.id)
+            )
+            request_id = (await self._session.execute(request_query)).scalar_one_or_none()
+            if request_id is None:
+                raise ValueError("Статус 'Новая' не найден в базе данных")
+            logger.debug(f"Заявка {request_id} на '{equipment_name}' создана")
+            return request_id
+        except (SQLAlchemyError, ConnectionDoesNotExistError) as e:
+            logger.error(f"Ошибка при создании заявки на '{equipment_name}': {e}")
+            await self._session.rollback()
+            raise
+
 
 class CompanyContactDAO(BaseDAO[CompanyContact]):
     """Объект доступа к данным (DAO) для управления записями CompanyContact.
@@ -118,10 +260,18 @@ class CompanyContactDAO(BaseDAO[CompanyContact]):
     """
     model = CompanyContact
 
-    async def get_active_contact(self) -> CompanyContact | None:
-        """Получить активную контактную информацию."""
-        filters = CompanyContactFilter(is_active=True)
-        return await self.find_one_or_none(filters)
+    async def get_active_contact(self) -> CompanyContactRead | None:
+        """Получить снимок активной контактной информации (с кэшированием на уровне процесса)."""
+        try:
+            return _active_contact_cache[_ACTIVE_CONTACT_KEY]
+        except KeyError:
+            pass
+        filters = {"is_active": True}
+        contact = await self.find_one_or_none(filters)
+        # Валидация намеренно пропускается: источник данных - БД, значения уже соответствуют типам колонок
+        snapshot = CompanyContactRead.from_orm_trusted(contact) if contact is not None else None
+        _active_contact_cache[_ACTIVE_CONTACT_KEY] = snapshot
+        return snapshot
 
 
 class PaymentTransactionDAO(BaseDAO[PaymentTransaction]):
@@ -134,9 +284,35 @@ class UserDAO(BaseDAO[User]):
 
     async def find_by_telegram_id(self, telegram_id: int) -> User | None:
         """Найти пользователя по telegram_id с предзагрузкой статуса."""
-        filters = TelegramIDModel(telegram_id=telegram_id)
+        filters = {"telegram_id": telegram_id}
         return await self.find_one_or_none(filters, options=[selectinload(User.status)])
 
+    async def add_if_absent(self, telegram_id: int, username: str | None, status: str) -> bool:
+        """Создает пользователя со статусом по названию одним INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+
+        Возвращает True, если пользователь добавлен; False - если он уже есть или статус не найден.
+        """
+        logger.debug(f"Добавление пользователя tg_id={telegram_id} со статусом '{status}'")
+        try:
+            status_query = (
+                select(literal(telegram_id), literal(username), UserStatus.id)
+                .where(UserStatus.status == status)
+            )
+            query = (
+                insert(self.model)
+                .from_select(["telegram_id", "username", "status_id"], status_query)
+                .on_conflict_do_nothing(index_elements=[self.model.telegram_id])
+                .returning(self.model.id)
+            )
+            result = await self._session.execute(query)
+            inserted = result.scalar_one_or_none() is not None
+            logger.debug(f"Пользователь tg_id={telegram_id} {'добавлен' if inserted else 'не добавлен'}")
+            return inserted
+        except (SQLAlchemyError, ConnectionDoesNotExistError) as e:
+            logger.error(f"Ошибка при добавлении пользователя tg_id={telegram_id}: {e}")
+            await self._session.rollback()
+            raise
+
 
 class UserStatusDAO(BaseDAO[UserStatus]):
     """Объект доступа к данным (DAO) для управления записями UserStatus."""
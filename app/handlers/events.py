@@ -0,0 +1,33 @@
+from aiogram.types import Update, CallbackQuery, Message, User
+
+# Разбор событий по точному типу: один поиск в словаре вместо цепочки isinstance.
+# Update приходит в middleware диспетчера, CallbackQuery и Message - в middleware роутеров.
+_USER_EXTRACTORS = {
+    Update: lambda e: (e.callback_query and e.callback_query.from_user) or (e.message and e.message.from_user),
+    CallbackQuery: lambda e: e.from_user,
+    Message: lambda e: e.from_user,
+}
+
+_MESSAGE_CALLBACK_EXTRACTORS = {
+    Update: lambda e: (e.callback_query.message, e.callback_query) if e.callback_query else (e.message, None),
+    CallbackQuery: lambda e: (e.message, e),
+    Message: lambda e: (e, None),
+}
+
+
+def _no_user(_event) -> None:
+    return None
+
+
+def _no_message_callback(_event) -> tuple[None, None]:
+    return None, None
+
+
+def get_user_from_update(event) -> User | None:
+    """Возвращает пользователя, отправившего событие: Update, CallbackQuery или Message."""
+    return _USER_EXTRACTORS.get(type(event), _no_user)(event)
+
+
+def extract_message_and_callback(event) -> tuple[Message | None, CallbackQuery | None]:
+    """Возвращает (сообщение, callback) из события: Update, CallbackQuery или Message."""
+    return _MESSAGE_CALLBACK_EXTRACTORS.get(type(event), _no_message_callback)(event)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
+from operator import attrgetter
 
 from sqlalchemy import String, Text, Integer, ForeignKey, Numeric, Index, TIMESTAMP, DECIMAL, Boolean, BigInteger
 from sqlalchemy.dialects.postgresql import JSONB
@@ -8,6 +9,17 @@ from sqlalchemy.sql import func
 
 from app.core.database import Base
 
+# Шаблоны __repr__ рассчитаны заранее: attrgetter читает поля одним вызовом, без разбора f-строки и
+# обращения к self.__class__.__name__ при каждом выводе модели в лог.
+_repr_id = attrgetter("id")
+_repr_id_name = attrgetter("id", "name")
+_repr_rental = attrgetter("id", "equipment_id")
+_repr_request = attrgetter("id", "tg_id", "status_id")
+_repr_contact = attrgetter("id", "company_name")
+_repr_payment = attrgetter("id", "request_id", "status")
+_repr_user_status = attrgetter("id", "status")
+_repr_user = attrgetter("id", "telegram_id", "status_id")
+
 
 class Privacy_Policy(Base):
     """Модель для хранения политики конфиденциальности.
@@ -23,8 +35,10 @@ class Privacy_Policy(Base):
     version: Mapped[str] = mapped_column(String(10), nullable=False, unique=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
-    def __repr__(self):
-        return f"{self.__class__.__name__}(id={self.id})"
+    _repr_template = "Privacy_Policy(id=%s)"
+
+    def __repr__(self) -> str:
+        return self._repr_template % _repr_id(self)
 
 
 class Special_Equipment_Category(Base):
@@ -38,6 +52,8 @@ class Special_Equipment_Category(Base):
         updated_at: datetime - Временная метка последнего обновления категории.
     """
     __tablename__ = "special_equipment_categories"
+    # path_image заполняется сервером (server_default): значение возвращается через RETURNING в том же INSERT
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
@@ -45,7 +61,6 @@ class Special_Equipment_Category(Base):
     path_image: Mapped[str] = mapped_column(
         String(255),
         nullable=False,
-        default="https://iimg.su/i/Tx3v8r",
         server_default="https://iimg.su/i/Tx3v8r"
     )
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
@@ -60,8 +75,10 @@ class Special_Equipment_Category(Base):
         back_populates="category", cascade="all, delete"
     )
 
+    _repr_template = "<Special_Equipment_Category(id=%s, name=%s)>"
+
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}(id={self.id}, name={self.name})>"
+        return self._repr_template % _repr_id_name(self)
 
 
 class Special_Equipment(Base):
@@ -102,8 +119,10 @@ class Special_Equipment(Base):
         back_populates="equipment", cascade="all, delete"
     )
 
+    _repr_template = "<Special_Equipment(id=%s, name=%s)>"
+
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}(id={self.id}, name={self.name})>"
+        return self._repr_template % _repr_id_name(self)
 
 
 class Equipment_Rental_History(Base):
@@ -130,13 +149,17 @@ class Equipment_Rental_History(Base):
 
     equipment: Mapped["Special_Equipment"] = relationship(back_populates="rental_history")
 
+    _repr_template = "<Equipment_Rental_History(id=%s, equipment_id=%s)>"
+
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}(id={self.id}, equipment_id={self.equipment_id})>"
+        return self._repr_template % _repr_rental(self)
 
 
 Index("idx_equipment_category_id", Special_Equipment.category_id)
 Index("idx_rental_history_equipment_id", Equipment_Rental_History.equipment_id)
 Index("idx_rental_history_dates", Equipment_Rental_History.start_date, Equipment_Rental_History.end_date)
+# Отчеты по дням (объем аренды) группируют по date_trunc('day', ...) — индекс по выражению
+Index("idx_rental_history_start_day", func.date_trunc("day", Equipment_Rental_History.start_date))
 
 
 class Request_Status(Base):
@@ -146,8 +169,10 @@ class Request_Status(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False, unique=True)
 
+    _repr_template = "<Request_Status(id=%s, name=%s)>"
+
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}(id={self.id}, name={self.name})>"
+        return self._repr_template % _repr_id_name(self)
 
 
 class Request(Base):
@@ -174,8 +199,10 @@ class Request(Base):
     payment_transactions: Mapped[list["PaymentTransaction"]] = relationship(
         back_populates="request", cascade="all, delete")
 
+    _repr_template = "<Request(id=%s, tg_id=%s, status_id=%s)>"
+
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}(id={self.id}, tg_id={self.tg_id}, status_id={self.status_id})>"
+        return self._repr_template % _repr_request(self)
 
 
 class CompanyContact(Base):
@@ -198,6 +225,8 @@ class CompanyContact(Base):
         updated_at: datetime - Временная метка последнего обновления записи.
     """
     __tablename__ = "company_contacts"
+    # image_url заполняется сервером (server_default): значение возвращается через RETURNING в том же INSERT
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     company_name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -213,7 +242,6 @@ class CompanyContact(Base):
     image_url: Mapped[str] = mapped_column(
         String(255),
         nullable=False,
-        default="https://iimg.su/i/7vTQV5",
         server_default="https://iimg.su/i/7vTQV5"
     )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
@@ -224,8 +252,10 @@ class CompanyContact(Base):
         onupdate=func.now()
     )
 
+    _repr_template = "<CompanyContact(id=%s, company_name=%s)>"
+
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}(id={self.id}, company_name={self.company_name})>"
+        return self._repr_template % _repr_contact(self)
 
 
 class PaymentTransaction(Base):
@@ -252,8 +282,17 @@ class PaymentTransaction(Base):
 
     request: Mapped["Request"] = relationship("Request", back_populates="payment_transactions")
 
+    _repr_template = "<PaymentTransaction(id=%s, request_id=%s, status=%s)>"
+
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}(id={self.id}, request_id={self.request_id}, status={self.status})>"
+        return self._repr_template % _repr_payment(self)
+
+
+# Точечный поиск транзакции по идентификатору платежа (только равенство) — hash-индекс компактнее B-tree.
+# Уникальное ограничение на transaction_id сохраняется: оно защищает от повторной записи одного платежа.
+Index("idx_payment_transaction_id_hash", PaymentTransaction.transaction_id, postgresql_using="hash")
+# Дневная выручка: группировка платежей по date_trunc('day', created_at)
+Index("idx_payment_created_day", func.date_trunc("day", PaymentTransaction.created_at))
 
 
 class UserStatus(Base):
@@ -263,8 +302,10 @@ class UserStatus(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     status: Mapped[str] = mapped_column(String(50), nullable=False, unique=True)
 
+    _repr_template = "<UserStatus(id=%s, status=%s)>"
+
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}(id={self.id}, status={self.status})>"
+        return self._repr_template % _repr_user_status(self)
 
 
 class User(Base):
@@ -282,5 +323,7 @@ class User(Base):
 
     status: Mapped["UserStatus"] = relationship("UserStatus")
 
+    _repr_template = "<User(id=%s, telegram_id=%s, status_id=%s)>"
+
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}(id={self.id}, telegram_id={self.telegram_id}, status_id={self.status_id})>"
+        return self._repr_template % _repr_user(self)
@@ -1,19 +1,51 @@
+from __future__ import annotations
+
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, Dict
+from typing import Optional, Dict, Union
 from pydantic import BaseModel, ConfigDict, HttpUrl
 
 
+class TrustedReadModel(BaseModel):
+    """Базовая схема для Read-схем, которые строятся из ORM-объектов.
+
+    Данные, прочитанные из БД, уже соответствуют типам колонок, поэтому from_orm_trusted
+    собирает схему через model_construct без повторной валидации каждого поля.
+    Для данных из внешних источников используйте обычный model_validate.
+    """
+
+    @classmethod
+    def from_orm_trusted(cls, obj):
+        return cls.model_construct(**{name: getattr(obj, name) for name in cls.model_fields})
+
+
+class PartialUpdateModel(BaseModel):
+    """Базовая схема для Update-схем (частичное обновление записи)."""
+
+    def patch(self) -> dict:
+        """Возвращает только явно переданные поля.
+
+        Для плоских схем результат совпадает с model_dump(exclude_unset=True), но обходятся
+        только заданные поля, а не все поля схемы через сериализатор.
+        """
+        return {name: getattr(self, name) for name in self.model_fields_set}
+
+
+# Фильтры и идентификаторы только передаются в DAO: неизменяемые, строгие (без приведения "5" -> 5)
+# и без лишних полей; from_attributes сохранен, чтобы фильтр можно было собрать из ORM-объекта
+FILTER_CONFIG = ConfigDict(frozen=True, strict=True, extra="forbid", from_attributes=True)
+
+
 class TelegramIDModel(BaseModel):
     telegram_id: int
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = FILTER_CONFIG
 
 
 class PrivacyPolicyFilter(BaseModel):
     is_active: bool = True
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = FILTER_CONFIG
 
 
 class SpecialEquipmentCategoryBase(BaseModel):
@@ -34,7 +66,7 @@ class SpecialEquipmentCategoryCreate(SpecialEquipmentCategoryBase):
     model_config = ConfigDict(from_attributes=True)
 
 
-class SpecialEquipmentCategoryUpdate(SpecialEquipmentCategoryBase):
+class SpecialEquipmentCategoryUpdate(PartialUpdateModel, SpecialEquipmentCategoryBase):
     """Схема для обновления существующей категории спецтехники.
     Используется в PATCH/PUT-запросах для частичного или полного обновления.
     Все поля опциональны, чтобы клиент мог обновить только часть данных.
@@ -44,7 +76,7 @@ class SpecialEquipmentCategoryUpdate(SpecialEquipmentCategoryBase):
     model_config = ConfigDict(from_attributes=True)
 
 
-class SpecialEquipmentCategoryRead(SpecialEquipmentCategoryBase):
+class SpecialEquipmentCategoryRead(TrustedReadModel, SpecialEquipmentCategoryBase):
     """Схема для чтения данных о категории спецтехники.
     Используется в GET-запросах для сериализации ответа API.
     Включает автоматически генерируемые поля (id, created_at, updated_at).
@@ -59,6 +91,7 @@ class SpecialEquipmentCategoryRead(SpecialEquipmentCategoryBase):
 
 class SpecialEquipmentCategoryCatId(BaseModel):
     category_id: int
+    model_config = FILTER_CONFIG
 
 
 class SpecialEquipmentCategoryId(BaseModel):
@@ -67,10 +100,17 @@ class SpecialEquipmentCategoryId(BaseModel):
 
 class SpecialEquipmentIdFilter(BaseModel):
     id: int
+    model_config = FILTER_CONFIG
 
 
 class SpecialEquipmentIdFilterName(BaseModel):
     name: str
+    model_config = FILTER_CONFIG
+
+
+# Технические характеристики: плоский словарь "параметр -> значение" (например, {"power": "110 hp"}).
+# Конкретный тип значений дает pydantic готовый валидатор вместо обхода произвольного Dict[Any, Any].
+TechnicalSpecs = Dict[str, Union[str, int, float, bool]]
 
 
 class SpecialEquipmentBase(SpecialEquipmentCategoryId):
@@ -80,7 +120,7 @@ class SpecialEquipmentBase(SpecialEquipmentCategoryId):
     description: Optional[str] = None
     rental_price_per_day: Decimal
     category_id: int
-    technical_specs: Optional[Dict] = None
+    technical_specs: Optional[TechnicalSpecs] = None
     image_path: Optional[str] = None  # Добавлено новое поле
 
 
@@ -89,18 +129,18 @@ class SpecialEquipmentCreate(SpecialEquipmentBase):
     model_config = ConfigDict(from_attributes=True)
 
 
-class SpecialEquipmentUpdate(SpecialEquipmentBase):
+class SpecialEquipmentUpdate(PartialUpdateModel, SpecialEquipmentBase):
     # Схема для обновления существующей единицы спецтехники.
     name: Optional[str] = None
     description: Optional[str] = None
     rental_price_per_day: Optional[Decimal] = None
     category_id: Optional[int] = None
-    technical_specs: Optional[Dict] = None
+    technical_specs: Optional[TechnicalSpecs] = None
     image_path: Optional[str] = None  # Добавлено новое поле
     model_config = ConfigDict(from_attributes=True)
 
 
-class SpecialEquipmentRead(SpecialEquipmentBase):
+class SpecialEquipmentRead(TrustedReadModel, SpecialEquipmentBase):
     # Схема для чтения данных о спецтехнике.
     id: int
     created_at: Optional[datetime] = None
@@ -126,7 +166,7 @@ class EquipmentRentalHistoryCreate(EquipmentRentalHistoryBase):
     model_config = ConfigDict(from_attributes=True)
 
 
-class EquipmentRentalHistoryUpdate(EquipmentRentalHistoryBase):
+class EquipmentRentalHistoryUpdate(PartialUpdateModel, EquipmentRentalHistoryBase):
     # Схема для обновления записи об аренде.
     # Используется в PATCH/PUT-запросах для частичного или полного обновления.
     # Все поля опциональны для гибкого обновления.
@@ -139,7 +179,7 @@ class EquipmentRentalHistoryUpdate(EquipmentRentalHistoryBase):
     model_config = ConfigDict(from_attributes=True)
 
 
-class EquipmentRentalHistoryRead(EquipmentRentalHistoryBase):
+class EquipmentRentalHistoryRead(TrustedReadModel, EquipmentRentalHistoryBase):
     # Схема для чтения данных об аренде.
     # Используется в GET-запросах для сериализации ответа API.
     # Включает id и created_at для полной информации.
@@ -159,13 +199,13 @@ class RequestStatusCreate(RequestStatusBase):
     model_config = ConfigDict(from_attributes=True)
 
 
-class RequestStatusUpdate(BaseModel):
+class RequestStatusUpdate(PartialUpdateModel):
     """Схема для обновления статуса заявки."""
     name: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
 
 
-class RequestStatusRead(RequestStatusBase):
+class RequestStatusRead(TrustedReadModel, RequestStatusBase):
     """Схема для чтения статуса заявки."""
     id: int
     model_config = ConfigDict(from_attributes=True)
@@ -195,7 +235,7 @@ class RequestCreate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-class RequestUpdate(BaseModel):
+class RequestUpdate(PartialUpdateModel):
     """Схема для обновления заявки."""
     tg_id: Optional[int] = None
     equipment_name: Optional[str] = None
@@ -208,7 +248,7 @@ class RequestUpdate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-class RequestRead(RequestBase):
+class RequestRead(TrustedReadModel, RequestBase):
     """Схема для чтения заявки."""
     id: int
     created_at: datetime
@@ -220,6 +260,7 @@ class RequestFilter(BaseModel):
     id: Optional[int] = None
     tg_id: Optional[int] = None
     status_id: Optional[int] = None
+    model_config = FILTER_CONFIG
 
 
 class CompanyContactBase(BaseModel):
@@ -243,7 +284,7 @@ class CompanyContactCreate(CompanyContactBase):
     model_config = ConfigDict(from_attributes=True)
 
 
-class CompanyContactUpdate(BaseModel):
+class CompanyContactUpdate(PartialUpdateModel):
     """Схема для обновления контактной информации."""
     company_name: Optional[str] = None
     description: Optional[str] = None
@@ -260,9 +301,13 @@ class CompanyContactUpdate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-class CompanyContactRead(CompanyContactBase):
-    """Схема для чтения контактной информации."""
+class CompanyContactRead(TrustedReadModel, CompanyContactBase):
+    """Схема для чтения контактной информации.
+    URL-поля читаются из БД, где уже хранятся проверенные строки, поэтому здесь они str, а не HttpUrl.
+    """
     id: int
+    website: Optional[str] = None
+    image_url: Optional[str] = None
     is_active: bool
     created_at: datetime
     updated_at: datetime
@@ -272,7 +317,7 @@ class CompanyContactRead(CompanyContactBase):
 class CompanyContactFilter(BaseModel):
     """Схема для фильтрации контактной информации."""
     is_active: Optional[bool] = True
-    model_config = ConfigDict(from_attributes=True)
+    model_config = FILTER_CONFIG
 
 
 class PaymentTransactionCreate(BaseModel):
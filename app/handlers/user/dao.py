@@ -1,7 +1,37 @@
+from asyncpg.exceptions import ConnectionDoesNotExistError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
 from app.core.base_dao import BaseDAO
 from app.handlers.user.models import Agree_Policy
+from app.utils import get_logger
+
+logger = get_logger(__name__)
 
 
 class AgreePolicyDAO(BaseDAO[Agree_Policy]):
     model = Agree_Policy
 
+    async def add_if_absent(self, telegram_id: int, name: str) -> bool:
+        """Сохраняет согласие одним INSERT ... ON CONFLICT DO NOTHING.
+
+        Возвращает True, если запись добавлена, и False, если пользователь уже соглашался.
+        ON CONFLICT опирается на уникальный индекс ix_agree_policys_telegram_id, который
+        init_db создаёт и в существующих базах; name больше не уникален и конфликтов не даёт.
+        """
+        logger.debug(f"Добавление согласия с политикой для tg_id={telegram_id}")
+        try:
+            query = (
+                insert(self.model)
+                .values(telegram_id=telegram_id, name=name)
+                .on_conflict_do_nothing(index_elements=[self.model.telegram_id])
+                .returning(self.model.id)
+            )
+            result = await self._session.execute(query)
+            inserted = result.scalar_one_or_none() is not None
+            logger.debug(f"Согласие tg_id={telegram_id} {'добавлено' if inserted else 'уже существует'}")
+            return inserted
+        except (SQLAlchemyError, ConnectionDoesNotExistError) as e:
+            logger.error(f"Ошибка при добавлении согласия для tg_id={telegram_id}: {e}")
+            await self._session.rollback()
+            raise
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from aiogram_dialog.widgets.common import ManagedScroll
 from aiogram_dialog.widgets.kbd import ScrollingGroup, Select
 from aiogram_dialog.widgets.text import Format
@@ -10,230 +11,110 @@ logger = get_logger(__name__)
 
 SCROLLING_HEIGHT = 5
 
-
-def paginated_categories(on_click):
-    async def update_category_page(event: CallbackQuery, scroll: "ManagedScroll", manager: DialogManager) -> None:
-        try:
-            callback_data = event.data
-            if "category_ids:" in callback_data:
-                page_str = callback_data.split("category_ids:")[1]
-                page = int(page_str)
-                total_pages = manager.dialog_data.get("total_category_pages", 1)
-                logger.debug(f"Получено total_pages из dialog_data: {total_pages}")
-                if 0 <= page < total_pages:
-                    manager.dialog_data["category_page"] = page
-                    logger.debug(f"Обновлена страница категорий: {page}")
-                else:
-                    logger.warning(f"Попытка установить недопустимую страницу: {page}, всего страниц: {total_pages}")
-            else:
-                logger.error(f"Неверный формат callback_data: {callback_data}")
-        except (ValueError, TypeError, IndexError) as e:
-            logger.error(f"Ошибка при обновлении страницы категорий: {str(e)}")
-
+# Общие для всех пагинированных списков параметры и текст кнопки: Format не хранит состояния,
+# поэтому один экземпляр разделяется всеми Select
+_SG_KW = dict(width=1, height=SCROLLING_HEIGHT, hide_on_single_page=True, hide_pager=False)
+_ITEM_TEXT = Format("{item[0]}")
+_ITEM_ID = itemgetter(1)
+
+
+@dataclass(frozen=True, slots=True)
+class PageSpec:
+    """Описание пагинированного списка для общего обработчика смены страницы.
+
+    widget_id - id ScrollingGroup;
+    total_key / page_key - ключи dialog_data с числом страниц и текущей страницей;
+    title - название списка для логов;
+    per_category - ключи дополняются category_id из start_data (список техники по категории).
+    """
+    widget_id: str
+    total_key: str
+    page_key: str
+    title: str
+    per_category: bool = False
+
+
+# Реестр списков по id ScrollingGroup: один обработчик _on_page обслуживает все списки
+_PAGE_SPECS: dict[str, PageSpec] = {}
+
+
+async def _on_page(event: CallbackQuery, scroll: "ManagedScroll", manager: DialogManager) -> None:
+    """Общий обработчик on_page_changed: сохраняет номер страницы в dialog_data по описанию списка."""
+    spec = _PAGE_SPECS.get(scroll.widget_id)
+    if spec is None:
+        logger.error(f"Неизвестный пагинированный список: {scroll.widget_id}")
+        return
+    try:
+        # ScrollingGroup уже разобрал callback_data и сохранил новую страницу до вызова on_page_changed
+        page = await scroll.get_page()
+        total_key, page_key = spec.total_key, spec.page_key
+        if spec.per_category:
+            category_id = manager.start_data.get("category_id")
+            if not category_id:
+                logger.error("category_id отсутствует в start_data")
+                return
+            total_key, page_key = f"{total_key}_{category_id}", f"{page_key}_{category_id}"
+        total_pages = manager.dialog_data.get(total_key, 1)
+        if 0 <= page < total_pages:
+            manager.dialog_data[page_key] = page
+            logger.debug(f"Обновлена страница {spec.title}: {page}")
+        else:
+            logger.warning(f"Попытка установить недопустимую страницу: {page}, всего страниц: {total_pages}")
+    except (ValueError, TypeError, IndexError) as e:
+        logger.error(f"Ошибка при обновлении страницы {spec.title}: {str(e)}")
+
+
+def _paginated(on_click, spec: PageSpec, select_id: str, items: str) -> ScrollingGroup:
+    _PAGE_SPECS[spec.widget_id] = spec
     return ScrollingGroup(
         Select(
-            Format("{item[0]}"),
-            id="s_scroll_categories",
-            item_id_getter=itemgetter(1),
-            items="categories",
+            _ITEM_TEXT,
+            id=select_id,
+            item_id_getter=_ITEM_ID,
+            items=items,
             on_click=on_click,
         ),
-        id="category_ids",
-        width=1,
-        height=SCROLLING_HEIGHT,
-        hide_on_single_page=True,
-        hide_pager=False,
-        on_page_changed=update_category_page,
+        id=spec.widget_id,
+        on_page_changed=_on_page,
+        **_SG_KW,
     )
 
 
+_CATEGORY_PAGES = PageSpec("category_ids", "total_category_pages", "category_page", "категорий")
+_EQUIPMENT_PAGES = PageSpec("equipment_ids", "total_equipment_pages", "equipment_page", "оборудования",
+                            per_category=True)
+_REQUEST_DATE_PAGES = PageSpec("request_date_ids", "total_cancel_date_pages", "cancel_date_page",
+                               "заявок по дате")
+_REQUEST_EQUIPMENT_PAGES = PageSpec("request_equipment_ids", "total_cancel_equipment_pages",
+                                    "cancel_equipment_page", "заявок по спецтехнике")
+_PENDING_PAYMENT_PAGES = PageSpec("pending_payment_ids", "total_pending_payment_pages", "pending_payment_page",
+                                  "заявок на оплату")
+_PAID_INVOICES_PAGES = PageSpec("paid_invoices_ids", "total_paid_invoices_pages", "paid_invoices_page",
+                                "оплаченных счетов")
+
+
+def paginated_categories(on_click):
+    return _paginated(on_click, _CATEGORY_PAGES, "s_scroll_categories", "categories")
+
+
 def paginated_equipment(on_click):
-    logger.debug("Создание paginated_equipment")
-
-    async def update_equipment_page(event: CallbackQuery, scroll: "ManagedScroll", manager: DialogManager) -> None:
-        try:
-            callback_data = event.data
-            if "equipment_ids:" in callback_data:
-                page_str = callback_data.split("equipment_ids:")[1]
-                page = int(page_str)
-                category_id = manager.start_data.get("category_id")
-                if not category_id:
-                    logger.error("category_id отсутствует в start_data")
-                    return
-                total_pages = manager.dialog_data.get(f"total_equipment_pages_{category_id}", 1)
-                if 0 <= page < total_pages:
-                    manager.dialog_data[f"equipment_page_{category_id}"] = page
-                    logger.debug(f"Обновлена страница оборудования для category_id={category_id}: {page}")
-                else:
-                    logger.warning(f"Попытка установить недопустимую страницу: {page}, всего страниц: {total_pages}")
-            else:
-                logger.error(f"Неверный формат callback_data: {callback_data}")
-        except (ValueError, TypeError, IndexError) as e:
-            logger.error(f"Ошибка при обновлении страницы оборудования: {str(e)}")
-
-    select_widget = Select(
-        Format("{item[0]}"),
-        id="s_scroll_equipment",
-        item_id_getter=itemgetter(1),
-        items="equipment",
-        on_click=on_click,
-    )
-    scrolling_group = ScrollingGroup(
-        select_widget,
-        id="equipment_ids",
-        width=1,
-        height=SCROLLING_HEIGHT,
-        hide_on_single_page=True,
-        hide_pager=False,
-        on_page_changed=update_equipment_page,
-    )
-    logger.debug(f"Создана клавиатура с id=equipment_ids, содержит Select")
-    return scrolling_group
+    return _paginated(on_click, _EQUIPMENT_PAGES, "s_scroll_equipment", "equipment")
 
 
 def paginated_requests_by_date(on_click):
-    async def update_request_date_page(event: CallbackQuery, scroll: "ManagedScroll", manager: DialogManager) -> None:
-        try:
-            callback_data = event.data
-            if "request_date_ids:" in callback_data:
-                page_str = callback_data.split("request_date_ids:")[1]
-                page = int(page_str)
-                total_pages = manager.dialog_data.get("total_cancel_date_pages", 1)
-                logger.debug(f"Получено total_pages для заявок по дате: {total_pages}")
-                if 0 <= page < total_pages:
-                    manager.dialog_data["cancel_date_page"] = page
-                    logger.debug(f"Обновлена страница заявок по дате: {page}")
-                else:
-                    logger.warning(f"Попытка установить недопустимую страницу: {page}, всего страниц: {total_pages}")
-            else:
-                logger.error(f"Неверный формат callback_data: {callback_data}")
-        except (ValueError, TypeError, IndexError) as e:
-            logger.error(f"Ошибка при обновлении страницы заявок по дате: {str(e)}")
-
-    return ScrollingGroup(
-        Select(
-            Format("{item[0]}"),
-            id="s_scroll_requests_date",
-            item_id_getter=itemgetter(1),
-            items="requests",
-            on_click=on_click,
-        ),
-        id="request_date_ids",
-        width=1,
-        height=SCROLLING_HEIGHT,
-        hide_on_single_page=True,
-        hide_pager=False,
-        on_page_changed=update_request_date_page,
-    )
+    return _paginated(on_click, _REQUEST_DATE_PAGES, "s_scroll_requests_date", "requests")
 
 
 def paginated_requests_by_equipment(on_click):
-    async def update_request_equipment_page(event: CallbackQuery, scroll: "ManagedScroll",
-                                            manager: DialogManager) -> None:
-        try:
-            callback_data = event.data
-            if "request_equipment_ids:" in callback_data:
-                page_str = callback_data.split("request_equipment_ids:")[1]
-                page = int(page_str)
-                total_pages = manager.dialog_data.get("total_cancel_equipment_pages", 1)
-                logger.debug(f"Получено total_pages для заявок по спецтехнике: {total_pages}")
-                if 0 <= page < total_pages:
-                    manager.dialog_data["cancel_equipment_page"] = page
-                    logger.debug(f"Обновлена страница заявок по спецтехнике: {page}")
-                else:
-                    logger.warning(f"Попытка установить недопустимую страницу: {page}, всего страниц: {total_pages}")
-            else:
-                logger.error(f"Неверный формат callback_data: {callback_data}")
-        except (ValueError, TypeError, IndexError) as e:
-            logger.error(f"Ошибка при обновлении страницы заявок по спецтехнике: {str(e)}")
-
-    return ScrollingGroup(
-        Select(
-            Format("{item[0]}"),
-            id="s_scroll_requests_equipment",
-            item_id_getter=itemgetter(1),
-            items="requests",
-            on_click=on_click,
-        ),
-        id="request_equipment_ids",
-        width=1,
-        height=SCROLLING_HEIGHT,
-        hide_on_single_page=True,
-        hide_pager=False,
-        on_page_changed=update_request_equipment_page,
-    )
+    return _paginated(on_click, _REQUEST_EQUIPMENT_PAGES, "s_scroll_requests_equipment", "requests")
 
 
 def paginated_pending_payment_requests(on_click):
-    async def update_pending_payment_page(event: CallbackQuery, scroll: "ManagedScroll",
-                                          manager: DialogManager) -> None:
-        try:
-            callback_data = event.data
-            if "pending_payment_ids:" in callback_data:
-                page_str = callback_data.split("pending_payment_ids:")[1]
-                page = int(page_str)
-                total_pages = manager.dialog_data.get("total_pending_payment_pages", 1)
-                logger.debug(f"Получено total_pages для заявок на оплату: {total_pages}")
-                if 0 <= page < total_pages:
-                    manager.dialog_data["pending_payment_page"] = page
-                    logger.debug(f"Обновлена страница заявок на оплату: {page}")
-                else:
-                    logger.warning(f"Попытка установить недопустимую страницу: {page}, всего страниц: {total_pages}")
-            else:
-                logger.error(f"Неверный формат callback_data: {callback_data}")
-        except (ValueError, TypeError, IndexError) as e:
-            logger.error(f"Ошибка при обновлении страницы заявок на оплату: {str(e)}")
-
-    return ScrollingGroup(
-        Select(
-            Format("{item[0]}"),
-            id="s_scroll_pending_payment",
-            item_id_getter=itemgetter(1),
-            items="requests",
-            on_click=on_click,
-        ),
-        id="pending_payment_ids",
-        width=1,
-        height=SCROLLING_HEIGHT,
-        hide_on_single_page=True,
-        hide_pager=False,
-        on_page_changed=update_pending_payment_page,
-    )
+    return _paginated(on_click, _PENDING_PAYMENT_PAGES, "s_scroll_pending_payment", "requests")
 
 
 def paginated_paid_invoices(on_click):
-    async def update_paid_invoices_page(event: CallbackQuery, scroll: "ManagedScroll", manager: DialogManager) -> None:
-        try:
-            callback_data = event.data
-            if "paid_invoices_ids:" in callback_data:
-                page_str = callback_data.split("paid_invoices_ids:")[1]
-                page = int(page_str)
-                total_pages = manager.dialog_data.get("total_paid_invoices_pages", 1)
-                if 0 <= page < total_pages:
-                    manager.dialog_data["paid_invoices_page"] = page
-                    logger.debug(f"Обновлена страница оплаченных счетов: {page}")
-                else:
-                    logger.warning(f"Попытка установить недопустимую страницу: {page}, всего страниц: {total_pages}")
-            else:
-                logger.error(f"Неверный формат callback_data: {callback_data}")
-        except (ValueError, TypeError, IndexError) as e:
-            logger.error(f"Ошибка при обновлении страницы оплаченных счетов: {str(e)}")
-
-    return ScrollingGroup(
-        Select(
-            Format("{item[0]}"),
-            id="s_scroll_paid_invoices",
-            item_id_getter=itemgetter(1),
-            items="transactions",
-            on_click=on_click,
-        ),
-        id="paid_invoices_ids",
-        width=1,
-        height=SCROLLING_HEIGHT,
-        hide_on_single_page=True,
-        hide_pager=False,
-        on_page_changed=update_paid_invoices_page,
-    )
+    return _paginated(on_click, _PAID_INVOICES_PAGES, "s_scroll_paid_invoices", "transactions")
 
 
 def paginated_requests_in_progress(on_click):
@@ -245,35 +126,6 @@ def paginated_requests_completed(on_click):
 
 
 def paginated_requests_by_status(status_key: str, on_click):
-    async def update_page(event: CallbackQuery, scroll: "ManagedScroll", manager: DialogManager) -> None:
-        try:
-            callback_data = event.data
-            if f"{status_key}_ids:" in callback_data:
-                page_str = callback_data.split(f"{status_key}_ids:")[1]
-                page = int(page_str)
-                total_pages = manager.dialog_data.get(f"total_{status_key}_pages", 1)
-                if 0 <= page < total_pages:
-                    manager.dialog_data[f"{status_key}_page"] = page
-                    logger.debug(f"Обновлена страница заявок '{status_key}': {page}")
-                else:
-                    logger.warning(f"Попытка установить недопустимую страницу: {page}, всего страниц: {total_pages}")
-            else:
-                logger.error(f"Неверный формат callback_data: {callback_data}")
-        except (ValueError, TypeError, IndexError) as e:
-            logger.error(f"Ошибка при обновлении страницы заявок '{status_key}': {str(e)}")
-
-    return ScrollingGroup(
-        Select(
-            Format("{item[0]}"),
-            id=f"s_scroll_{status_key}",
-            item_id_getter=itemgetter(1),
-            items="requests",
-            on_click=on_click,
-        ),
-        id=f"{status_key}_ids",
-        width=1,
-        height=SCROLLING_HEIGHT,
-        hide_on_single_page=True,
-        hide_pager=False,
-        on_page_changed=update_page,
-    )
+    spec = PageSpec(f"{status_key}_ids", f"total_{status_key}_pages", f"{status_key}_page",
+                    f"заявок '{status_key}'")
+    return _paginated(on_click, spec, f"s_scroll_{status_key}", "requests")
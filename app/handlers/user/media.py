@@ -0,0 +1,60 @@
+from contextlib import suppress
+
+from aiogram import Bot
+from aiogram.enums import ContentType
+from aiogram.exceptions import TelegramAPIError
+from aiogram_dialog.api.entities import MediaId
+from aiogram_dialog.context.media_storage import MediaIdStorage
+from aiogram_dialog.widgets.media import StaticMedia
+from aiogram_dialog.widgets.text import Format
+
+from app.config import settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Изображение главного меню и большинства окон пользовательского диалога
+MENU_PHOTO_URL = "https://iimg.su/i/7vTQV5"
+
+# StaticMedia не хранит состояния, поэтому один виджет используется во всех окнах с изображением меню
+MENU_PHOTO = StaticMedia(url=MENU_PHOTO_URL, type=ContentType.PHOTO)
+
+# Фото выбранной техники: путь берется из image_path, который отдают геттеры окон с техникой
+EQUIPMENT_PHOTO = StaticMedia(url=Format("{image_path}"), type=ContentType.PHOTO)
+
+
+async def _upload_menu_photo(bot: Bot, chat_id: str) -> str | None:
+    """Загружает фото меню в служебный чат и возвращает его file_id; сообщение сразу удаляется."""
+    try:
+        message = await bot.send_photo(chat_id, photo=MENU_PHOTO_URL, disable_notification=True)
+    except TelegramAPIError as e:
+        logger.warning(f"Не удалось загрузить фото меню в чат {chat_id}: {e}")
+        return None
+    with suppress(TelegramAPIError):
+        await message.delete()
+    return message.photo[-1].file_id
+
+
+async def seed_media_ids(storage: MediaIdStorage, bot: Bot) -> None:
+    """Заранее кладет в хранилище file_id изображения меню, чтобы ни одно окно не отправлялось по URL.
+
+    aiogram_dialog отправляет фото по file_id, если он есть в хранилище, иначе Telegram заново скачивает
+    изображение по URL. file_id берется из настройки MENU_PHOTO_FILE_ID; если она не задана, но задан
+    MEDIA_UPLOAD_CHAT_ID, фото один раз загружается в этот чат при запуске, а полученный file_id
+    пишется в лог, чтобы его можно было сохранить в настройках.
+    """
+    file_id = settings.menu_photo_file_id
+    if not file_id and settings.media_upload_chat_id:
+        file_id = await _upload_menu_photo(bot, settings.media_upload_chat_id)
+        if file_id:
+            logger.info(f"Фото меню загружено, file_id для MENU_PHOTO_FILE_ID: {file_id}")
+    if not file_id:
+        logger.debug("file_id изображения меню не задан, первая отправка пойдет по URL")
+        return
+    await storage.save_media_id(
+        path=None,
+        url=MENU_PHOTO_URL,
+        type=ContentType.PHOTO,
+        media_id=MediaId(file_id),
+    )
+    logger.debug("file_id изображения меню добавлен в хранилище медиа")
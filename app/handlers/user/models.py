@@ -1,14 +1,16 @@
-from sqlalchemy import Integer
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import BigInteger
 
-from app.core.database import Base, str_uniq
+from app.core.database import Base
 
 
 class Agree_Policy(Base):
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    telegram_id: Mapped[int] = mapped_column(BigInteger)
-    name: Mapped[str_uniq]
+    # id, created_at и updated_at наследуются от Base
+    telegram_id: Mapped[int] = mapped_column(BigInteger, unique=True, index=True)
+    # Имя пользователя не уникально: тёзки не должны мешать сохранению согласия
+    name: Mapped[str]
 
-    def __repr__(self):
-        return f"{self.__class__.__name__}(id={self.id})"
+    _repr_template = "Agree_Policy(id=%s)"
+
+    def __repr__(self) -> str:
+        return self._repr_template % self.id
@@ -1,12 +1,16 @@
+import asyncio
+import weakref
+from contextlib import suppress
 from datetime import datetime
-from decimal import Decimal
+from functools import lru_cache, wraps
 from typing import Dict, Any
 
 from aiogram import Router
 from aiogram import F
 from aiogram.enums import ContentType
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
 from aiogram.filters import Command
-from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo, Update, \
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo, \
     KeyboardButton, ReplyKeyboardMarkup, PreCheckoutQuery
 from aiogram_dialog import Dialog, DialogManager, Window, StartMode
 from aiogram_dialog.widgets.input import MessageInput
@@ -14,6 +18,7 @@ from aiogram_dialog.widgets.kbd import Button, SwitchTo, Cancel, Back
 from aiogram_dialog.widgets.media import StaticMedia
 from aiogram_dialog.widgets.text import Const, Format
 from aiogram_dialog.api.exceptions import NoContextError, UnknownIntent
+from cachetools import TTLCache
 from pydantic import ValidationError
 
 from app.address_utils import validate_address, reverse_geocode, geocode_address
@@ -26,23 +31,36 @@ from app.handlers.user.window import create_confirmation_window, create_rental_c
     create_pending_payment_window, create_payment_window, create_paid_invoices_window, \
     create_paid_invoice_details_window, create_my_requests_window, create_requests_in_progress_window, \
     create_requests_completed_window, create_request_details_window
-from app.utils.logging import get_logger
+from app.handlers.user.media import MENU_PHOTO, EQUIPMENT_PHOTO
+from app.utils.logging import get_logger, REQUEST_LOGGER
+from app.utils.money import from_kopecks
+from app.utils.background import run_in_background
 
-from app.core.database import connection, async_session_maker
+from app.core.batching import IdBatcher
+from app.core.database import connection
 from app.handlers import BaseHandler
-from app.handlers.schemas import TelegramIDModel, SpecialEquipmentIdFilter, \
-    RequestCreate, EquipmentRentalHistoryCreate, SpecialEquipmentCategoryId, RequestStatusBase, RequestFilter, \
-    RequestUpdate, UserCreate
+from app.handlers.events import get_user_from_update, extract_message_and_callback
+from app.handlers.schemas import RequestCreate, RequestStatusBase, RequestFilter, RequestUpdate
 from app.handlers.user.dao import AgreePolicyDAO
-from app.handlers.dao import SpecialEquipmentCategoryDAO, SpecialEquipmentDAO, RequestDAO, EquipmentRentalHistoryDAO, \
-    PaymentTransactionDAO, RequestStatusDAO, UserDAO, UserStatusDAO
+from app.handlers.dao import SpecialEquipmentCategoryDAO, SpecialEquipmentDAO, RequestDAO, \
+    PaymentTransactionDAO, RequestStatusDAO, UserDAO
 from app.handlers.user.schemas import AgreePolicyModel
-from app.handlers.user.utils import AgreePolicyFilter, get_active_policy_url, async_get_category_buttons, \
-    async_get_equipment_buttons, async_get_equipment_details, validate_phone_number, no_err_filter
+from app.handlers.user.utils import AgreePolicyFilter, mark_policy_agreed, cached_active_policy_url, \
+    async_get_category_buttons, async_get_equipment_buttons, async_get_equipment_details, validate_phone_number, \
+    no_err_filter, load_category_equipment
 from app.handlers.user.keyboards import paginated_categories, paginated_equipment
 
 logger = get_logger(__name__)
 
+# Сколько секунд клиент Telegram может не пересылать повторные нажатия той же кнопки меню.
+# Значение небольшое, чтобы переход "туда и обратно" по меню не терял нажатия
+_MENU_CALLBACK_CACHE_TIME = 1
+
+_STALE_RESTART_TEXT = "Диалог устарел. Начинаем заново! 🚀"
+_STALE_START_HINT_TEXT = "Диалог устарел. Пожалуйста, начните заново с команды /start."
+_NO_POLICY_TEXT = ("Пожалуйста, ознакомьтесь и согласитесь с политикой конфиденциальности. "
+                   "Тогда функционал бота станет доступен.")
+
 
 async def is_private_chat(message: Message) -> bool:
     return message.chat.type == "private"
@@ -52,126 +70,181 @@ async def is_group_chat(message: Message) -> bool:
     return message.chat.type in ["group", "supergroup"]
 
 
-def get_user_from_update(event: Update):
-    if isinstance(event, Update):
-        if event.callback_query:
-            return event.callback_query.from_user
-        elif event.message:
-            return event.message.from_user
-    elif isinstance(event, CallbackQuery):
-        return event.from_user
-    elif isinstance(event, Message):
-        return event.from_user
-    return None
+async def _answer_quietly(callback: CallbackQuery, **kwargs) -> None:
+    """Отвечает на callback, не прерывая обработчик, если запрос уже отвечен или устарел."""
+    with suppress(TelegramBadRequest):
+        await callback.answer(**kwargs)
+
+
+# Недавние нажатия (user_id, callback_data): клиенты Telegram при быстрых нажатиях присылают дубли
+_recent_taps: TTLCache = TTLCache(maxsize=10_000, ttl=0.5)
+
+
+def _debounced(handler):
+    """Отвечает на повторное нажатие той же кнопки в течение 0.5 с, не вызывая обработчик.
+
+    Ставится первым декоратором, чтобы дубль не доходил до запросов к базе.
+    """
+    @wraps(handler)
+    async def wrapper(callback: CallbackQuery, *args, **kwargs):
+        logger_my = REQUEST_LOGGER.get(logger)
+        key = (callback.from_user.id, callback.data)
+        if key in _recent_taps:
+            logger_my.debug("Повторное нажатие %s пользователем %s пропущено", callback.data, callback.from_user.id)
+            await _answer_quietly(callback)
+            return None
+        _recent_taps[key] = True
+        return await handler(callback, *args, **kwargs)
+
+    return wrapper
 
 
+@_debounced
 async def on_start_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
-    logger_my.debug(f"Пользователь {dialog_manager.event.from_user.id} нажал 'Начать'")
+    logger_my = REQUEST_LOGGER.get(logger)
+    logger_my.debug("Пользователь %s нажал '%s'", callback.from_user.id, "Начать")
+    await callback.answer(cache_time=_MENU_CALLBACK_CACHE_TIME)
     await dialog_manager.switch_to(MainDialogStates.action_menu)
 
 
 async def on_rent_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
-    logger_my.debug(f"Пользователь {dialog_manager.event.from_user.id} нажал 'Аренда'")
-    logger_my.debug(f"Переход в состояние {MainDialogStates.select_category}")
+    logger_my = REQUEST_LOGGER.get(logger)
+    logger_my.debug("Пользователь %s нажал '%s'", callback.from_user.id, "Аренда")
+    logger_my.debug("Переход в состояние %s", MainDialogStates.select_category)
+    await callback.answer(cache_time=_MENU_CALLBACK_CACHE_TIME)
     try:
         await dialog_manager.switch_to(MainDialogStates.select_category)
     except NoContextError as e:
-        logger_my.error(f"Ошибка контекста диалога при переходе в select_category: {str(e)}")
+        logger_my.error("Ошибка контекста диалога при переходе в select_category: %s", e)
         await callback.message.answer("Ошибка: диалог не инициализирован. Попробуйте снова с /start.")
-        await callback.answer()
 
 
-@connection()
-async def on_category_click(callback: CallbackQuery, widget, manager: DialogManager, item_id: str, session) -> None:
-    logger_my = manager.middleware_data.get("logger") or logger
+@_debounced
+async def on_category_click(callback: CallbackQuery, widget, manager: DialogManager, item_id: str) -> None:
+    logger_my = REQUEST_LOGGER.get(logger)
     category_id = int(item_id)
     manager.dialog_data["category_id"] = category_id
-    logger_my.debug(f'category_id сохранился = {manager.dialog_data["category_id"]}')
-    category_name = await get_category_name(category_id, session)
-    logger_my.debug(f"Пользователь {manager.event.from_user.id} выбрал категорию '{category_name}' (id={category_id})")
+    logger_my.debug("category_id сохранился = %s", category_id)
+    # Список техники загружается в своей сессии параллельно с названием категории и передается в start_data,
+    # чтобы геттер окна выбора техники не делал повторный запрос
+    # Ответ на callback уходит одновременно с запросами, а не отдельным запросом после смены окна
+    _, category_name, (equipment, path_image) = await asyncio.gather(
+        _answer_quietly(callback),
+        get_category_name(category_id),
+        load_category_equipment(category_id),
+    )
+    logger_my.debug("Пользователь %s выбрал категорию '%s' (id=%s)", callback.from_user.id, category_name,
+                    category_id)
     await manager.start(
         state=MainDialogStates.select_equipment,
-        data={"category_id": category_id, "category_name": category_name},
+        data={
+            "category_id": category_id,
+            "category_name": category_name,
+            "equipment_prefetch": equipment,
+            "path_image": path_image,
+        },
         mode=StartMode.NORMAL
     )
-    await callback.answer()
 
 
-async def get_category_name(category_id, session):
-    if not session:
-        logger.error("Сессия базы данных отсутствует")
-        return "Неизвестная категория"
-    category_dao = SpecialEquipmentCategoryDAO(session)
-    category = await category_dao.find_one_or_none(SpecialEquipmentCategoryId(id=category_id))
-    return category.name if category else "Неизвестная категория"
+# Одновременные выборы категорий и техники разными пользователями загружаются одним запросом WHERE id IN (...)
+_category_names = IdBatcher(lambda session, ids: SpecialEquipmentCategoryDAO(session).find_names(ids))
+_equipment_cards = IdBatcher(lambda session, ids: SpecialEquipmentDAO(session).find_cards(ids))
 
+# Названия категорий меняются редко, а нужны при каждом выборе категории. Бот категории не редактирует
+# (их меняют напрямую в БД), поэтому кэш не сбрасывается: переименование видно не позже чем через TTL
+_category_name_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+# Блокировки на category_id: при промахе кэша в базу идет только один запрос, остальные ждут его результат
+_category_name_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
 
-@connection()
-async def on_equipment_click(callback: CallbackQuery, widget, manager: DialogManager, item_id: str, session) -> None:
-    logger_my = manager.middleware_data.get("logger") or logger
-    logger_my.debug(f"Обработчик on_equipment_click вызван для item_id={item_id}, callback_data={callback.data}")
+
+async def get_category_name(category_id):
+    try:
+        return _category_name_cache[category_id]
+    except KeyError:
+        pass
+    lock = _category_name_locks.get(category_id)
+    if lock is None:
+        lock = _category_name_locks[category_id] = asyncio.Lock()
+    async with lock:
+        # Пока ждали блокировку, название мог загрузить параллельный запрос
+        name = _category_name_cache.get(category_id)
+        if name is not None:
+            return name
+        name = await _category_names.get(category_id)
+        if name is None:
+            return "Неизвестная категория"
+        _category_name_cache[category_id] = name
+        return name
+
+
+@_debounced
+async def on_equipment_click(callback: CallbackQuery, widget, manager: DialogManager, item_id: str) -> None:
+    logger_my = REQUEST_LOGGER.get(logger)
+    logger_my.debug("Обработчик on_equipment_click вызван для item_id=%s, callback_data=%s", item_id, callback.data)
     equipment_id = int(item_id)
-    equipment_dao = SpecialEquipmentDAO(session)
-    equipment = await equipment_dao.find_one_or_none(SpecialEquipmentIdFilter(id=equipment_id))
-    if not equipment:
-        logger_my.error(f"Техника с id={equipment_id} не найдена")
+    _, card = await asyncio.gather(_answer_quietly(callback), _equipment_cards.get(equipment_id))
+    if not card:
+        logger_my.error("Техника с id=%s не найдена", equipment_id)
         await callback.message.answer("Техника не найдена.")
-        await callback.answer()
         return
-    category_id = equipment.category_id
-    logger_my.debug(f"Пользователь {manager.event.from_user.id} выбрал технику '{equipment.name}' (id={equipment_id})")
+    logger_my.debug("Пользователь %s выбрал технику '%s' (id=%s)", callback.from_user.id, card["name"],
+                    equipment_id)
+    # Карточка передается в окно деталей целиком: его геттеру не нужно повторно читать ту же строку
     await manager.start(
         state=MainDialogStates.view_equipment_details,
-        data={"equipment_id": equipment_id, 'category_id': category_id},
+        data={"equipment_id": equipment_id, 'category_id': card["category_id"], "equipment_card": card},
         mode=StartMode.NORMAL
     )
-    await callback.answer()
 
 
 async def on_back_to_menu_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user_id = callback.from_user.id
-    logger_my.debug(f"Пользователь {user_id} нажал 'Назад' в окне Категории, callback_data={callback.data}")
+    logger_my.debug("Пользователь %s нажал 'Назад' в окне Категории, callback_data=%s", user_id, callback.data)
     try:
         current_state = dialog_manager.current_context().state if dialog_manager.current_context() else "None"
-        logger_my.debug(f"Текущее состояние: {current_state}, переход в {MainDialogStates.action_menu}")
+        logger_my.debug("Текущее состояние: %s, переход в %s", current_state, MainDialogStates.action_menu)
         await dialog_manager.switch_to(MainDialogStates.action_menu)
-        logger_my.debug(f"Пользователь {user_id} успешно вернулся в главное меню")
+        logger_my.debug("Пользователь %s успешно вернулся в главное меню", user_id)
     except Exception as e:
-        logger_my.error(f"Ошибка при переходе в главное меню: {str(e)}", exc_info=True)
+        logger_my.error("Ошибка при переходе в главное меню: %s", e, exc_info=True)
         await callback.message.answer("Ошибка при возврате в главное меню. Попробуйте снова.")
     await callback.answer()
 
 
 async def on_pending_payment_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
-    logger_my.debug(f"Пользователь {dialog_manager.event.from_user.id} нажал 'Заявки на оплату'")
-    await dialog_manager.start(
-        state=MainDialogStates.pending_payment_requests,
-        mode=StartMode.NORMAL
+    logger_my = REQUEST_LOGGER.get(logger)
+    logger_my.debug("Пользователь %s нажал '%s'", callback.from_user.id, "Заявки на оплату")
+    await asyncio.gather(
+        dialog_manager.start(state=MainDialogStates.pending_payment_requests, mode=StartMode.NORMAL),
+        callback.answer(cache_time=_MENU_CALLBACK_CACHE_TIME),
     )
-    await callback.answer()
 
 
 async def on_more_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
-    logger_my.debug(f"Пользователь {dialog_manager.event.from_user.id} нажал 'Подробнее'")
-    await dialog_manager.switch_to(MainDialogStates.more_menu)
-    await callback.answer()
+    logger_my = REQUEST_LOGGER.get(logger)
+    logger_my.debug("Пользователь %s нажал '%s'", callback.from_user.id, "Подробнее")
+    await asyncio.gather(dialog_manager.switch_to(MainDialogStates.more_menu),
+                         callback.answer(cache_time=_MENU_CALLBACK_CACHE_TIME))
 
 
 async def on_exit_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user_id = callback.from_user.id
-    try:
-        logger_my.debug(f"Пользователь {user_id} вышел из меню")
-        await callback.message.delete()
-        dialog_manager.dialog_data.clear()
-        await dialog_manager.reset_stack()
-    except Exception as e:
-        logger_my.error(f"Ошибка при выходе из меню для пользователя {user_id}: {str(e)}", exc_info=True)
+    logger_my.debug("Пользователь %s вышел из меню", user_id)
+    # Удаление сообщения, сброс стека диалогов и ответ на callback независимы и выполняются параллельно;
+    # ошибка одного из них (например, сообщение уже удалено) не отменяет остальные
+    delete_error, reset_error, answer_error = await asyncio.gather(
+        callback.message.delete(), dialog_manager.reset_stack(), callback.answer(), return_exceptions=True
+    )
+    if isinstance(delete_error, Exception):
+        logger_my.warning("Не удалось удалить меню пользователя %s: %s", user_id, delete_error)
+    if isinstance(answer_error, Exception):
+        logger_my.warning("Не удалось ответить на callback пользователя %s: %s", user_id, answer_error)
+    if isinstance(reset_error, Exception):
+        logger_my.error("Ошибка при выходе из меню для пользователя %s: %s", user_id, reset_error,
+                        exc_info=reset_error)
         await callback.message.answer("Произошла ошибка. Попробуйте снова.")
 
 
@@ -179,16 +252,18 @@ async def go_menu(callback: CallbackQuery, button: Button, manager: DialogManage
     await manager.switch_to(MainDialogStates.action_menu)
 
 
+# Клавиатура запроса контакта не меняется: собирается один раз при импорте
+_CONTACT_KB = ReplyKeyboardMarkup(
+    keyboard=[[KeyboardButton(text="Отправить номер", request_contact=True)]],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
+
+
 async def on_share_contact_click(callback, button, manager: DialogManager):
-    contact_button = KeyboardButton(text="Отправить номер", request_contact=True)
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[[contact_button]],
-        resize_keyboard=True,
-        one_time_keyboard=True
-    )
     await callback.message.answer(
         "Нажмите кнопку ниже, чтобы отправить ваш номер телефона.",
-        reply_markup=keyboard
+        reply_markup=_CONTACT_KB
     )
     await callback.answer()
 
@@ -203,7 +278,8 @@ async def on_phone_number_input(message: Message, widget: MessageInput, dialog_m
         else:
             dialog_manager.dialog_data["error_message"] = "Неверный формат номера телефона."
     else:
-        phone = message.text
+        # Сообщение без текста (стикер, фото) не должно ронять проверку
+        phone = message.text or ""
         formatted_phone = validate_phone_number(phone)
         if formatted_phone:
             dialog_manager.dialog_data["phone_number"] = formatted_phone
@@ -217,111 +293,105 @@ async def on_phone_number_input(message: Message, widget: MessageInput, dialog_m
             )
 
 
+@connection()
+async def _save_request(new_request: RequestCreate, session) -> None:
+    # Заявка и история аренды пишутся двумя INSERT ... SELECT в одной транзакции.
+    # Сессия обновления сюда не передается: @connection() откроет свою и зафиксирует ее до ответа пользователю
+    await RequestDAO(session).create_with_rental(new_request)
+
+
+async def _notify_managers(bot, new_request: RequestCreate) -> None:
+    """Уведомляет чат менеджеров о сохраненной заявке (выполняется в фоне)."""
+    # Задача создана из обработчика и унаследовала его контекст вместе с логгером
+    logger_my = REQUEST_LOGGER.get(logger)
+    manager_message = (
+        f"📢 Новая заявка\n"
+        f"👤 Пользователь: {new_request.first_name} (@{new_request.username})\n"
+        f"🚜 Техника: {new_request.equipment_name}\n"
+        f"📅 Дата: {new_request.selected_date.strftime('%d.%m.%Y')}\n"
+        f"📞 Телефон: {new_request.phone_number}\n"
+        f"📍 Адрес: {new_request.address}\n"
+        f"🆔 Telegram ID: {new_request.tg_id}"
+    )
+
+    try:
+        await bot.send_message(
+            chat_id=settings.chat_id,
+            text=manager_message
+        )
+        logger_my.debug(
+            f"Уведомление о новой заявке отправлено в чат менеджеров {settings.chat_id}")
+
+    except Exception as e:
+        logger_my.error(f"Ошибка при отправке уведомления в чат менеджеров: {str(e)}")
+
+
 async def on_send_request_click(callback: CallbackQuery, button: Button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user = callback.from_user
     data = dialog_manager.dialog_data
-    bot = callback.message.bot
+    # Бот захватывается сразу: фоновая задача переживает обработчик и не должна держать callback
+    bot = callback.bot
 
-    # Извлекаем данные из диалога
     equipment_name = data.get("equipment_name")
     selected_date = data.get("selected_date")
     phone_number = data.get("phone_number")
     address = data.get("address")
-    first_name = user.first_name
-    username = user.username
-
-    if not username:
-        username = None
-
-    async with async_session_maker() as session:
-        try:
-            equipment_dao = SpecialEquipmentDAO(session)
-            equipment = await equipment_dao.find_by_name(equipment_name)
-            if not equipment:
-                raise ValueError(f"Спецтехника с именем '{equipment_name}' не найдено")
-
-            request_dao = RequestDAO(session)
-            new_request = RequestCreate(
-                tg_id=user.id,
-                equipment_name=equipment_name,
-                selected_date=selected_date,
-                phone_number=phone_number,
-                address=address,
-                first_name=first_name,
-                username=username
-            )
-            temp = await request_dao.add(new_request)
-
-            rental_history_dao = EquipmentRentalHistoryDAO(session)
-            rental_history = EquipmentRentalHistoryCreate(
-                equipment_id=equipment.id,
-                start_date=selected_date,
-                rental_price_at_time=equipment.rental_price_per_day
-            )
-            await rental_history_dao.add(rental_history)
-
-            await session.commit()
-
-            formatted_date = datetime.fromisoformat(selected_date).strftime("%d.%m.%Y")
-            manager_message = (
-                f"📢 Новая заявка\n"
-                f"👤 Пользователь: {first_name} (@{username})\n"
-                f"🚜 Техника: {equipment_name}\n"
-                f"📅 Дата: {formatted_date}\n"
-                f"📞 Телефон: {phone_number}\n"
-                f"📍 Адрес: {address}\n"
-                f"🆔 Telegram ID: {user.id}"
-            )
-
-            try:
-                await bot.send_message(
-                    chat_id=settings.chat_id,
-                    text=manager_message
-                )
-                logger_my.debug(
-                    f"Уведомление о новой заявке отправлено в чат менеджеров {settings.chat_id}")
+    if not (equipment_name and selected_date and phone_number and address):
+        logger_my.error("Неполные данные заявки пользователя %s: %s", user.id, data)
+        await callback.answer("Не удалось отправить заявку, заполните данные заново.", show_alert=True)
+        return
 
-            except Exception as e:
-                logger_my.error(f"Ошибка при отправке уведомления в чат менеджеров: {str(e)}")
+    # Поля уже проверены на шагах диалога, а id и имя пришли от Telegram: повторная валидация pydantic не нужна
+    new_request = RequestCreate.model_construct(
+        tg_id=user.id,
+        equipment_name=equipment_name,
+        selected_date=datetime.fromisoformat(selected_date),
+        phone_number=phone_number,
+        address=address,
+        first_name=user.first_name,
+        username=user.username or None
+    )
 
-            await callback.message.answer("Заявка успешно отправлена!")
-        except Exception as e:
-            await session.rollback()
-            return
+    # Ответ на callback уходит параллельно с записью заявки, а окно подтверждения показывается только
+    # после ее фиксации в базе. Ответ на callback к этому моменту уже использован, поэтому об ошибке
+    # пользователь узнает отдельным сообщением
+    save_result, _ = await asyncio.gather(_save_request(new_request), callback.answer(), return_exceptions=True)
+    if isinstance(save_result, Exception):
+        logger_my.error("Ошибка при сохранении заявки пользователя %s: %s", user.id, save_result)
+        await callback.message.answer("Ошибка при отправке заявки. Попробуйте позже.")
+        return
 
+    # Уведомление менеджеров не должно задерживать ответ пользователю
+    run_in_background(_notify_managers(bot, new_request), name=f"notify_managers:{user.id}")
     await dialog_manager.switch_to(MainDialogStates.request_sent)
-    await callback.answer()
 
 
 async def on_cancel_rent_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
-    logger_my.debug(f"Пользователь {dialog_manager.event.from_user.id} нажал 'Отмена Аренды'")
-    await dialog_manager.start(
-        state=MainDialogStates.cancel_rent,
-        mode=StartMode.RESET_STACK
+    logger_my = REQUEST_LOGGER.get(logger)
+    logger_my.debug("Пользователь %s нажал '%s'", callback.from_user.id, "Отмена Аренды")
+    await asyncio.gather(
+        dialog_manager.start(state=MainDialogStates.cancel_rent, mode=StartMode.RESET_STACK),
+        callback.answer(cache_time=_MENU_CALLBACK_CACHE_TIME),
     )
-    await callback.answer()
 
 
 async def on_paid_invoices_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
-    logger_my.debug(f"Пользователь {dialog_manager.event.from_user.id} нажал 'Оплаченные счета'")
-    await dialog_manager.start(
-        state=MainDialogStates.paid_invoices,
-        mode=StartMode.NORMAL
+    logger_my = REQUEST_LOGGER.get(logger)
+    logger_my.debug("Пользователь %s нажал '%s'", callback.from_user.id, "Оплаченные счета")
+    await asyncio.gather(
+        dialog_manager.start(state=MainDialogStates.paid_invoices, mode=StartMode.NORMAL),
+        callback.answer(cache_time=_MENU_CALLBACK_CACHE_TIME),
     )
-    await callback.answer()
 
 
 async def on_my_requests_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
-    logger_my.debug(f"Пользователь {dialog_manager.event.from_user.id} нажал 'Мои заявки'")
-    await dialog_manager.start(
-        state=MainDialogStates.my_requests,
-        mode=StartMode.NORMAL
+    logger_my = REQUEST_LOGGER.get(logger)
+    logger_my.debug("Пользователь %s нажал '%s'", callback.from_user.id, "Мои заявки")
+    await asyncio.gather(
+        dialog_manager.start(state=MainDialogStates.my_requests, mode=StartMode.NORMAL),
+        callback.answer(cache_time=_MENU_CALLBACK_CACHE_TIME),
     )
-    await callback.answer()
 
 
 async def on_address_input(message: Message, widget: MessageInput, dialog_manager: DialogManager):
@@ -432,10 +502,7 @@ def main_dialog() -> Dialog:
     )
 
     view_equipment_details_window = Window(
-        StaticMedia(
-            url=Format("{image_path}"),
-            type=ContentType.PHOTO
-        ),
+        EQUIPMENT_PHOTO,
         Format("Техника: {equipment_name}"),
         Format("Цена аренды: {rental_price} руб/час"),
         Format("Описание: {description}"),
@@ -447,10 +514,7 @@ def main_dialog() -> Dialog:
     )
 
     enter_phone_window = Window(
-        StaticMedia(
-            url="https://iimg.su/i/7vTQV5",
-            type=ContentType.PHOTO
-        ),
+        MENU_PHOTO,
         Format("{error_message}", when="error_message"),
         Format("Техника: {equipment_name}", when=no_err_filter),
         Format("Дата: {selected_date}", when=no_err_filter),
@@ -466,10 +530,7 @@ def main_dialog() -> Dialog:
     )
 
     enter_address_window = Window(
-        StaticMedia(
-            url="https://iimg.su/i/7vTQV5",
-            type=ContentType.PHOTO
-        ),
+        MENU_PHOTO,
         Format("{error_message}", when="error_message"),
         Format("Техника: {equipment_name}", when=no_err_filter),
         Format("Дата: {selected_date}", when=no_err_filter),
@@ -495,10 +556,7 @@ def main_dialog() -> Dialog:
     )
 
     create_request_window = Window(
-        StaticMedia(
-            url="https://iimg.su/i/7vTQV5",
-            type=ContentType.PHOTO
-        ),
+        MENU_PHOTO,
         Format("Заявка на аренду почти готова..."),
         Format("✅ Техника: {equipment_name}"),
         Format("✅ Дата: {selected_date}"),
@@ -514,10 +572,7 @@ def main_dialog() -> Dialog:
     )
 
     request_sent_window = Window(
-        StaticMedia(
-            url="https://iimg.su/i/7vTQV5",
-            type=ContentType.PHOTO
-        ),
+        MENU_PHOTO,
         Const("Заявка успешно отправлена менеджеру! ✅"),
         Button(text=Const(text='Меню'), id='to_menu', on_click=go_menu),
         state=MainDialogStates.request_sent,
@@ -559,10 +614,7 @@ def main_dialog() -> Dialog:
     return Dialog(
         Window(
             Const("Главное меню"),
-            StaticMedia(
-                url="https://iimg.su/i/7vTQV5",
-                type=ContentType.PHOTO
-            ),
+            MENU_PHOTO,
             Const("Выберите, что вы хотите сделать:"),
             Button(Const("Аренда"), id="rent", on_click=on_rent_click),
             Button(Const("Отмена Аренды"), id="cancel_rent", on_click=on_cancel_rent_click),
@@ -574,10 +626,7 @@ def main_dialog() -> Dialog:
             state=MainDialogStates.action_menu,
         ),
         Window(
-            StaticMedia(
-                url="https://iimg.su/i/7vTQV5",
-                type=ContentType.PHOTO
-            ),
+            MENU_PHOTO,
             Const("Выберите категорию спецтехники:"),
             paginated_categories(on_category_click),
             Back(text=Const(text='Назад'), id='back_1_menu'),
@@ -629,56 +678,94 @@ def main_dialog() -> Dialog:
     )
 
 
+# Дерево окон и виджетов статично, поэтому диалог собирается один раз при импорте модуля
+_MAIN_DIALOG = main_dialog()
+
+_AGREE_BUTTON = InlineKeyboardButton(text="Согласен ✅", callback_data="agree_policy")
+
+
+@lru_cache(maxsize=4)
+def _policy_keyboard(policy_url: str) -> InlineKeyboardMarkup:
+    """Клавиатура согласия с политикой; меняется только вместе с URL политики, поэтому кэшируется по нему."""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [_AGREE_BUTTON],
+        [InlineKeyboardButton(
+            text="Политика конфиденциальности 📄",
+            web_app=WebAppInfo(url=policy_url)
+        )]
+    ])
+
+_START_COMMANDS = ("start", "menu", "меню", "начать", "main")
+# Фильтр не хранит состояния и используется обоими обработчиками команд запуска
+_START_FILTER = Command(commands=_START_COMMANDS)
+# Один экземпляр фильтра согласия и его отрицание на все регистрации
+_AGREED_FILTER = AgreePolicyFilter()
+_NOT_AGREED_FILTER = ~_AGREED_FILTER
+
+
+# Блокировки на пользователя для кнопки "Согласен": запись исчезает, как только обработка завершена
+_agree_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+async def on_agree_policy_click(callback: CallbackQuery, dialog_manager: DialogManager) -> None:
+    """Обрабатывает нажатие "Согласен", пропуская повторные нажатия, пока первое еще выполняется."""
+    user_id = callback.from_user.id
+    lock = _agree_locks.get(user_id)
+    if lock is None:
+        lock = _agree_locks[user_id] = asyncio.Lock()
+    if lock.locked():
+        await callback.answer("Уже обрабатываю…")
+        return
+    async with lock:
+        await _save_policy_agreement(callback, dialog_manager)
+
+
+async def _replace_policy_message(message: Message) -> None:
+    """Убирает сообщение с кнопкой согласия и сообщает о разблокировке функционала."""
+    await message.delete()
+    await message.answer("Спасибо, вы согласились с политикой конфиденциальности! "
+                         "Функционал разблокирован! Используйте /menu")
+
+
 @connection()
-async def on_agree_policy_click(callback: CallbackQuery, dialog_manager: DialogManager, session) -> None:
+async def _save_policy_agreement(callback: CallbackQuery, dialog_manager: DialogManager, session) -> None:
     user = callback.from_user
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     logger_my.debug(f"Пользователь {user.id} ({user.first_name}) согласился с политикой конфиденциальности")
     try:
         policy_dao = AgreePolicyDAO(session)
-        existing_policy = await policy_dao.find_one_or_none(TelegramIDModel(telegram_id=user.id))
-        if existing_policy:
+        # Проверка и вставка одним запросом: повторные нажатия не создают дублей
+        policy = AgreePolicyModel(telegram_id=user.id, name=user.first_name)
+        inserted = await policy_dao.add_if_absent(policy.telegram_id, policy.name)
+        if not inserted:
+            mark_policy_agreed(user.id)
             await callback.message.answer("Вы уже согласились с политикой конфиденциальности.")
             await callback.answer()
             return
 
-        await policy_dao.add(AgreePolicyModel(
-            telegram_id=user.id,
-            name=user.first_name,
-        ))
-
+        # Пользователь создается тем же способом: INSERT ... SELECT статуса ... ON CONFLICT DO NOTHING
         user_dao = UserDAO(session)
-        existing_user = await user_dao.find_by_telegram_id(user.id)
-        if not existing_user:
-            status_dao = UserStatusDAO(session)
-            default_status = await status_dao.find_one_or_none({"status": "пользователь"})
-            if not default_status:
-                raise ValueError("Статус 'active' не найден в базе данных")
-
-            await user_dao.add(UserCreate(
-                telegram_id=user.id,
-                username=user.username,
-                status_id=default_status.id
-            ))
-
-        await callback.message.delete()
-
-        await callback.message.answer("Спасибо, вы согласились с политикой конфиденциальности! "
-                                      "Функционал разблокирован! Используйте /menu")
+        await user_dao.add_if_absent(user.id, user.username, "пользователь")
+
         await session.commit()
+        mark_policy_agreed(user.id)
+        # Согласие уже сохранено: замена сообщения не должна задерживать обработчик
+        run_in_background(_replace_policy_message(callback.message), name=f"policy_agreed:{user.id}")
     except ValidationError as e:
-        logger_my.error(f"Ошибка валидации данных для tg_id={user.id}: {str(e)}", exc_info=True)
+        logger_my.error("Ошибка валидации данных для tg_id=%s: %s (ошибок: %s)", user.id, e.title, e.error_count(),
+                        exc_info=True)
         await callback.message.answer("Ошибка при сохранении данных. Попробуйте позже.")
         await session.rollback()
     except Exception as e:
-        logger_my.error(f"Ошибка при добавлении данных для tg_id={user.id}: {str(e)}", exc_info=True)
+        logger_my.error("Ошибка при добавлении данных для tg_id=%s: %s", user.id, e, exc_info=True)
         await callback.message.answer("Ошибка при сохранении данных. Попробуйте позже.")
         await session.rollback()
     await callback.answer()
 
 
 async def on_group_chat_command(message: Message) -> None:
-    logger.debug(
+    logger_my = REQUEST_LOGGER.get(logger)
+    logger_my.debug(
         f"Получена команда {message.text} в групповом чате {message.chat.id} от пользователя {message.from_user.id}")
     await message.answer(
         "Этот бот работает только в личных сообщениях. Пожалуйста, напишите мне в личный чат!"
@@ -687,145 +774,97 @@ async def on_group_chat_command(message: Message) -> None:
 
 class UserHandler(BaseHandler):
     def __init__(self, dp: Router):
-        self.dialog = main_dialog()
+        self.dialog = _MAIN_DIALOG
         super().__init__(dp)
         self.dp.include_router(self.dialog)
 
     def register_handlers(self):
-        self.dp.message(Command(commands=["start", "menu", "меню", "начать", "main"]), is_private_chat,
-                        AgreePolicyFilter())(self.start_command)
-        self.dp.message(is_private_chat, ~AgreePolicyFilter())(self.on_no_policy_agreement)
-        self.dp.callback_query(lambda c: c.data == "agree_policy")(on_agree_policy_click)
+        self.dp.message(_START_FILTER, is_private_chat, _AGREED_FILTER)(self.start_command)
+        self.dp.message(is_private_chat, _NOT_AGREED_FILTER)(self.on_no_policy_agreement)
+        self.dp.callback_query(F.data == "agree_policy")(on_agree_policy_click)
 
         self.dp.message(
-            Command(commands=["start", "menu", "меню", "начать", "main"]),
+            _START_FILTER,
             is_group_chat
         )(on_group_chat_command)
 
-        self.dp.pre_checkout_query(lambda query: True)(handle_pre_checkout_query)
+        self.dp.pre_checkout_query()(handle_pre_checkout_query)
         self.dp.message(F.content_type == ContentType.SUCCESSFUL_PAYMENT)(handle_successful_payment)
-        self.dp.callback_query(lambda c: c.data == "cancel_invoice")(cancel_invoice_handler)
+        self.dp.callback_query(F.data == "cancel_invoice")(cancel_invoice_handler)
 
     async def set_logger_middleware(self, handler, event, data: dict):
+        token = REQUEST_LOGGER.set(self.logger)
         try:
-            data["logger"] = self.logger
             return await handler(event, data)
         except UnknownIntent as e:
-            error_message = str(e)
-            intent_id = error_message.split("intent id: ")[-1] if "intent id: " in error_message else "unknown"
-            user = get_user_from_update(event)
-            user_id = user.id if user else "unknown"
-            self.logger.debug(f"Тип события: {type(event)}, содержимое: {event}")
-            self.logger.warning(
-                f"Устаревший контекст для intent_id={intent_id}, пользователь={user_id}. Сбрасываем диалог.")
-
-            message = None
-            if isinstance(event, Update) and event.callback_query:
-                self.logger.debug(f"Событие является Update с CallbackQuery, извлекаем сообщение")
-                message = event.callback_query.message
-            elif isinstance(event, CallbackQuery):
-                self.logger.debug(f"Событие является CallbackQuery, извлекаем сообщение")
-                message = event.message
-            else:
-                self.logger.debug(f"Событие не является CallbackQuery, редактирование сообщения невозможно")
-
-            dialog_manager = data.get("dialog_manager")
-            self.logger.debug(f"dialog_manager: {dialog_manager}")
-
-            if message:
-                self.logger.debug(f"Сообщение найдено: message_id={message.message_id}, chat_id={message.chat.id}")
-                try:
-                    await message.delete()
-                    self.logger.debug(
-                        f"Удалено сообщение для intent_id={intent_id}, пользователь={user_id}, message_id={message.message_id}")
-                except Exception as delete_error:
-                    self.logger.warning(f"Не удалось удалить сообщение: {str(delete_error)}")
-
+            return await self._handle_unknown_intent(event, data, e)
+        except Exception as e:
+            self.logger.error("Ошибка в middleware: %s", e, exc_info=True)
+            raise
+        finally:
+            REQUEST_LOGGER.reset(token)
+
+    async def _handle_unknown_intent(self, event, data: dict, exc: UnknownIntent) -> None:
+        """Сбрасывает устаревший диалог: удаляет старое сообщение и возвращает пользователя в главное меню."""
+        log = self.logger
+        dialog_manager = data.get("dialog_manager")
+        error_message = str(exc)
+        intent_id = error_message.split("intent id: ")[-1] if "intent id: " in error_message else "unknown"
+        user = get_user_from_update(event)
+        user_id = user.id if user else "unknown"
+        log.warning("Устаревший контекст для intent_id=%s, пользователь=%s. Сбрасываем диалог.", intent_id, user_id)
+
+        message, callback = extract_message_and_callback(event)
+
+        if callback is None:
+            # Устаревший контекст без нажатия кнопки: сбрасывать нечего, просто подсказываем команду
             if message:
                 try:
-                    if dialog_manager:
-                        try:
-                            await dialog_manager.reset_stack()
-                            dialog_manager.dialog_data.clear()
-                            await dialog_manager.start(state=MainDialogStates.action_menu, mode=StartMode.RESET_STACK)
-                            await message.edit_text("Диалог устарел. Начинаем заново! 🚀")
-                            if isinstance(event, Update) and event.callback_query:
-                                await event.callback_query.answer()
-                            elif isinstance(event, CallbackQuery):
-                                await event.answer()
-                        except Exception as reset_error:
-                            self.logger.error(f"Ошибка при сбросе диалога: {str(reset_error)}", exc_info=True)
-                            await message.edit_text("Произошла ошибка. Пожалуйста, начните заново с команды /start.")
-                            if isinstance(event, Update) and event.callback_query:
-                                await event.callback_query.answer()
-                            elif isinstance(event, CallbackQuery):
-                                await event.answer()
-                    else:
-                        # Если dialog_manager отсутствует, просто уведомляем пользователя
-                        self.logger.warning("dialog_manager отсутствует, сброс диалога невозможен")
-                        await message.edit_text("Диалог устарел. Пожалуйста, начните заново с команды /start.")
-                        if isinstance(event, Update) and event.callback_query:
-                            await event.callback_query.answer()
-                        elif isinstance(event, CallbackQuery):
-                            await event.answer()
-                except Exception as edit_error:
-                    self.logger.warning(f"Не удалось отредактировать сообщение: {str(edit_error)}")
-                    # Если редактирование не удалось, отправляем новое сообщение
-                    try:
-                        if dialog_manager:
-                            await dialog_manager.reset_stack()
-                            dialog_manager.dialog_data.clear()
-                            await dialog_manager.start(state=MainDialogStates.action_menu, mode=StartMode.RESET_STACK)
-                            await message.answer("Диалог устарел. Начинаем заново! 🚀")
-                        else:
-                            self.logger.warning("dialog_manager отсутствует, сброс диалога невозможен")
-                            await message.answer("Диалог устарел. Пожалуйста, начните заново с команды /start.")
-                        if isinstance(event, Update) and event.callback_query:
-                            await event.callback_query.answer()
-                        elif isinstance(event, CallbackQuery):
-                            await event.answer()
-                    except Exception as answer_error:
-                        self.logger.error(f"Не удалось отправить новое сообщение: {str(answer_error)}")
-            else:
-                self.logger.warning("Сообщение для редактирования недоступно, отправляем новое уведомление")
-                try:
-                    if isinstance(event, Update) and event.callback_query:
-                        if dialog_manager:
-                            await dialog_manager.reset_stack()
-                            dialog_manager.dialog_data.clear()
-                            await dialog_manager.start(state=MainDialogStates.action_menu, mode=StartMode.RESET_STACK)
-                            await event.callback_query.message.answer("Диалог устарел. Начинаем заново! 🚀")
-                        else:
-                            self.logger.warning("dialog_manager отсутствует, сброс диалога невозможен")
-                            await event.callback_query.message.answer(
-                                "Диалог устарел. Пожалуйста, начните заново с команды /start.")
-                        await event.callback_query.answer()
-                    elif isinstance(event, CallbackQuery):
-                        if dialog_manager:
-                            await dialog_manager.reset_stack()
-                            dialog_manager.dialog_data.clear()
-                            await dialog_manager.start(state=MainDialogStates.action_menu, mode=StartMode.RESET_STACK)
-                            await event.message.answer("Диалог устарел. Начинаем заново! 🚀")
-                        else:
-                            self.logger.warning("dialog_manager отсутствует, сброс диалога невозможен")
-                            await event.message.answer("Диалог устарел. Пожалуйста, начните заново с команды /start.")
-                        await event.answer()
-                    elif isinstance(event, Update) and event.message:
-                        await event.message.answer("Диалог устарел. Пожалуйста, начните заново с команды /start.")
-                    elif isinstance(event, Message):
-                        await event.answer("Диалог устарел. Пожалуйста, начните заново с команды /start.")
+                    await message.answer(_STALE_START_HINT_TEXT)
                 except Exception as answer_error:
-                    self.logger.error(f"Не удалось отправить новое сообщение: {str(answer_error)}")
-
+                    log.error("Не удалось отправить новое сообщение: %s", answer_error)
             return None
-        except Exception as e:
-            self.logger.error(f"Ошибка в middleware: {str(e)}", exc_info=True)
-            raise
+
+        if message:
+            try:
+                await message.delete()
+                log.debug("Удалено сообщение для intent_id=%s, пользователь=%s, message_id=%s",
+                          intent_id, user_id, message.message_id)
+            except TelegramBadRequest as delete_error:
+                log.debug("Сообщение устаревшего диалога уже не удалить: %s", delete_error)
+            except TelegramRetryAfter:
+                raise
+            except TelegramAPIError as delete_error:
+                log.warning("Не удалось удалить сообщение: %s", delete_error)
+
+        # Перезапуск диалога и ответ на callback независимы и выполняются параллельно
+        _, answer_error = await asyncio.gather(
+            self._restart_dialog(dialog_manager, message),
+            callback.answer(),
+            return_exceptions=True,
+        )
+        if isinstance(answer_error, Exception):
+            log.warning("Не удалось ответить на callback: %s", answer_error)
+        return None
+
+    async def _restart_dialog(self, dialog_manager: DialogManager | None, message: Message | None) -> None:
+        """Сбрасывает устаревший диалог в главное меню и сообщает об этом пользователю."""
+        try:
+            if dialog_manager:
+                # Режим RESET_STACK сам очищает стек, отдельный reset_stack() повторил бы запись в хранилище
+                await dialog_manager.start(state=MainDialogStates.action_menu, mode=StartMode.RESET_STACK)
+                text = _STALE_RESTART_TEXT
+            else:
+                self.logger.warning("dialog_manager отсутствует, сброс диалога невозможен")
+                text = _STALE_START_HINT_TEXT
+            if message:
+                await message.answer(text)
+        except Exception as reset_error:
+            self.logger.error("Ошибка при сбросе диалога: %s", reset_error, exc_info=True)
 
     async def start_command(self, message: Message, dialog_manager: DialogManager) -> None:
         user = message.from_user
-        self.logger.debug(f"Пользователь {user.id} ({user.first_name}) отправил команду /start или /menu")
-        dialog_manager.middleware_data["logger"] = self.logger
+        self.logger.debug("Пользователь %s (%s) отправил команду /start или /menu", user.id, user.first_name)
 
         fsm_context = dialog_manager.middleware_data.get("fsm_context")
         if fsm_context:
@@ -833,43 +872,45 @@ class UserHandler(BaseHandler):
             chat_id = message.chat.id
             storage_key = f"last_menu_message_id:{user_id_str}:{chat_id}"
             storage_data = await fsm_context.get_data()
-            last_menu_message_id = storage_data.get(storage_key)
+            last_menu_message_id = storage_data.pop(storage_key, None)
             if last_menu_message_id:
-                try:
-                    await message.bot.delete_message(chat_id=chat_id, message_id=last_menu_message_id)
-                    self.logger.debug(f"Удалено старое сообщение с меню: message_id={last_menu_message_id}")
-                except Exception as delete_error:
-                    self.logger.warning(f"Не удалось удалить старое сообщение с меню: {str(delete_error)}")
-                # Очищаем сохранённый message_id
-                await fsm_context.set_data({storage_key: None})
+                # Удаление старого меню не зависит от запуска нового диалога: идет в фоне, не задерживая его
+                run_in_background(self._delete_old_menu(message.bot, chat_id, last_menu_message_id),
+                                  name=f"delete_old_menu:{chat_id}")
+                # Удаляем сохранённый message_id одной записью, остальные данные FSM сохраняются
+                await fsm_context.set_data(storage_data)
         else:
             self.logger.warning("FSM-хранилище недоступно, не можем удалить старое сообщение с меню")
 
         await dialog_manager.start(state=MainDialogStates.action_menu, mode=StartMode.RESET_STACK)
 
-    @connection()
-    async def on_no_policy_agreement(self, message: Message, session) -> None:
+    async def _delete_old_menu(self, bot, chat_id: int, message_id: int) -> None:
+        try:
+            await bot.delete_message(chat_id=chat_id, message_id=message_id)
+            self.logger.debug("Удалено старое сообщение с меню: message_id=%s", message_id)
+        except TelegramBadRequest as delete_error:
+            # Сообщение уже удалено пользователем или слишком старое для удаления - обычная ситуация
+            self.logger.debug("Старое сообщение с меню уже не удалить: %s", delete_error)
+        except TelegramRetryAfter:
+            # Ограничение частоты обрабатывает middleware сессии бота, ошибку не скрываем
+            raise
+        except TelegramAPIError as delete_error:
+            self.logger.warning("Не удалось удалить старое сообщение с меню: %s", delete_error)
+
+    async def on_no_policy_agreement(self, message: Message) -> None:
         user = message.from_user
-        self.logger.debug(
-            f"Пользователь {user.id} ({user.first_name}) отправил сообщение без согласия с политикой")
-        policy_url = await get_active_policy_url(session)
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="Согласен ✅", callback_data="agree_policy")],
-            [InlineKeyboardButton(
-                text="Политика конфиденциальности 📄",
-                web_app=WebAppInfo(url=policy_url)
-            )]
-        ])
-        await message.answer(
-            text="Пожалуйста, ознакомьтесь и согласитесь с политикой конфиденциальности. "
-                 "Тогда функционал бота станет доступен.",
-            reply_markup=keyboard
-        )
+        self.logger.debug("Пользователь %s (%s) отправил сообщение без согласия с политикой",
+                          user.id, user.first_name)
+        # Соединение с БД открывается только при промахе кэша URL
+        policy_url = await cached_active_policy_url()
+        keyboard = _policy_keyboard(policy_url)
+        await message.answer(text=_NO_POLICY_TEXT, reply_markup=keyboard)
 
 
 @connection()
 async def handle_pre_checkout_query(pre_checkout_query: PreCheckoutQuery, bot, session) -> None:
-    logger.debug(f"Получен предварительный запрос на оплату: {pre_checkout_query.id}")
+    logger_my = REQUEST_LOGGER.get(logger)
+    logger_my.debug(f"Получен предварительный запрос на оплату: {pre_checkout_query.id}")
 
     try:
         if pre_checkout_query.invoice_payload.startswith("request_"):
@@ -877,7 +918,7 @@ async def handle_pre_checkout_query(pre_checkout_query: PreCheckoutQuery, bot, s
                 pre_checkout_query_id=pre_checkout_query.id,
                 ok=True
             )
-            logger.debug(f"Успешно подтвержден предварительный запрос: {pre_checkout_query.id}")
+            logger_my.debug(f"Успешно подтвержден предварительный запрос: {pre_checkout_query.id}")
         else:
             await bot.answer_pre_checkout_query(
                 pre_checkout_query_id=pre_checkout_query.id,
@@ -885,7 +926,7 @@ async def handle_pre_checkout_query(pre_checkout_query: PreCheckoutQuery, bot, s
                 error_message="Неверный идентификатор заказа."
             )
     except Exception as e:
-        logger.error(f"Ошибка при обработке предварительного запроса: {e}")
+        logger_my.error(f"Ошибка при обработке предварительного запроса: {e}")
         await bot.answer_pre_checkout_query(
             pre_checkout_query_id=pre_checkout_query.id,
             ok=False,
@@ -895,12 +936,13 @@ async def handle_pre_checkout_query(pre_checkout_query: PreCheckoutQuery, bot, s
 
 @connection()
 async def handle_successful_payment(message: Message, bot, session, **kwargs) -> None:
+    logger_my = REQUEST_LOGGER.get(logger)
     successful_payment = message.successful_payment
-    logger.debug(f"Получено уведомление об успешной оплате: {successful_payment.order_info}")
+    logger_my.debug(f"Получено уведомление об успешной оплате: {successful_payment.order_info}")
 
     payload = successful_payment.invoice_payload
     if not payload.startswith("request_"):
-        logger.error(f"Неверный payload в успешной оплате: {payload}")
+        logger_my.error(f"Неверный payload в успешной оплате: {payload}")
         return
 
     request_id = int(payload.replace("request_", ""))
@@ -912,7 +954,7 @@ async def handle_successful_payment(message: Message, bot, session, **kwargs) ->
         request_id=request_id,
         telegram_id=telegram_id,  # Добавляем telegram_id
         transaction_id=provider_payment_charge_id,
-        amount=Decimal(str(successful_payment.total_amount / 100.0)),
+        amount=from_kopecks(successful_payment.total_amount),
         status="success",
         created_at=datetime.now()
     )
@@ -927,7 +969,7 @@ async def handle_successful_payment(message: Message, bot, session, **kwargs) ->
             values=RequestUpdate(status_id=status_paid.id)
         )
         await session.commit()
-        logger.debug(f"Статус заявки {request_id} обновлен на 'Оплачено'")
+        logger_my.debug(f"Статус заявки {request_id} обновлен на 'Оплачено'")
 
     await bot.send_message(
         chat_id=message.chat.id,
@@ -941,9 +983,14 @@ async def handle_successful_payment(message: Message, bot, session, **kwargs) ->
 
 
 async def cancel_invoice_handler(callback_query: CallbackQuery):
+    logger_my = REQUEST_LOGGER.get(logger)
     try:
         await callback_query.message.delete()
-        logger.debug(f"Сообщение с инвойсом удалено пользователем {callback_query.from_user.id}")
-    except Exception as e:
-        logger.warning(f"Не удалось удалить сообщение: {e}")
+        logger_my.debug("Сообщение с инвойсом удалено пользователем %s", callback_query.from_user.id)
+    except TelegramBadRequest as e:
+        logger_my.debug("Сообщение с инвойсом уже не удалить: %s", e)
+    except TelegramRetryAfter:
+        raise
+    except TelegramAPIError as e:
+        logger_my.warning("Не удалось удалить сообщение: %s", e)
     await callback_query.answer()
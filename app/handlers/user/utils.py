@@ -1,47 +1,114 @@
+import asyncio
 import re
+from cachetools import LRUCache, TTLCache
 from aiogram.filters import BaseFilter
 from aiogram.types import Message
 from aiogram_dialog import DialogManager
 from datetime import datetime, timedelta
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.core.database import connection, get_session
-from app.handlers.models import Special_Equipment_Category, Special_Equipment
-from app.handlers.schemas import TelegramIDModel, PrivacyPolicyFilter, SpecialEquipmentCategoryCatId, \
-    SpecialEquipmentIdFilter, SpecialEquipmentIdFilterName, SpecialEquipmentCategoryId
+from app.core.database import connection, get_session, readonly_connection
+from app.handlers.models import Privacy_Policy, Special_Equipment_Category, Special_Equipment
 from app.handlers.user.dao import AgreePolicyDAO
-from app.handlers.dao import PrivacyPolicyDAO, SpecialEquipmentCategoryDAO, SpecialEquipmentDAO, \
-    EquipmentRentalHistoryDAO
-from app.utils.logging import get_logger
+from app.handlers.dao import SpecialEquipmentCategoryDAO, SpecialEquipmentDAO, EquipmentRentalHistoryDAO
+from app.handlers.user.media import MENU_PHOTO_URL
+from app.utils.logging import get_logger, REQUEST_LOGGER
 
 logger = get_logger(__name__)
 
 
-async def get_active_policy_url(session) -> str:
-    """Получает URL активной политики конфиденциальности из базы данных."""
+DEFAULT_POLICY_URL = "https://graph.org/Politika-konfidencialnosti-05-05-8"
+
+
+async def get_active_policy_url(db) -> str:
+    """Получает URL активной политики конфиденциальности из базы данных.
+
+    db - AsyncSession или AsyncConnection: запрос выбирает одну колонку и выполняется через execute(),
+    который есть у обоих.
+    """
     try:
-        policy_dao = PrivacyPolicyDAO(session)
-        active_policy = await policy_dao.find_one_or_none(PrivacyPolicyFilter(is_active=True))
-        if active_policy:
-            logger.debug(f"Найдена активная политика конфиденциальности с URL: {active_policy.url}")
-            return active_policy.url
+        query = select(Privacy_Policy.url).where(Privacy_Policy.is_active.is_(True)).limit(1)
+        result = await db.execute(query)
+        url = result.scalar_one_or_none()
+        if url:
+            logger.debug(f"Найдена активная политика конфиденциальности с URL: {url}")
+            return url
         logger.warning("Активная политика конфиденциальности не найдена в базе данных")
-        return "https://graph.org/Politika-konfidencialnosti-05-05-8"
+        return DEFAULT_POLICY_URL
     except Exception as e:
         logger.error(f"Ошибка при получении активной политики конфиденциальности: {str(e)}", exc_info=True)
-        return "https://graph.org/Politika-konfidencialnosti-05-05-8"
+        return DEFAULT_POLICY_URL
+
+
+_POLICY_URL_KEY = "active"
+# URL политики меняется крайне редко, а запрашивается на каждое сообщение пользователя без согласия.
+# Политику меняют напрямую в БД, поэтому кэш не сбрасывается явно: новый URL виден не позже чем через TTL
+_policy_url_cache: TTLCache = TTLCache(maxsize=1, ttl=60)
+# При промахе кэша URL загружает один запрос, остальные ждут его результат
+_policy_url_lock = asyncio.Lock()
+
+
+async def cached_active_policy_url(db=None) -> str:
+    """Возвращает URL активной политики, обращаясь к БД не чаще раза в минуту.
+
+    db - уже открытая сессия или соединение; если не передан, соединение открывается только при промахе кэша.
+    """
+    try:
+        return _policy_url_cache[_POLICY_URL_KEY]
+    except KeyError:
+        pass
+    async with _policy_url_lock:
+        # Пока ждали блокировку, URL мог загрузить параллельный запрос
+        url = _policy_url_cache.get(_POLICY_URL_KEY)
+        if url is None:
+            url = await get_active_policy_url(db) if db is not None else await _fetch_active_policy_url()
+            _policy_url_cache[_POLICY_URL_KEY] = url
+        return url
+
+
+@readonly_connection()
+async def _fetch_active_policy_url(conn) -> str:
+    return await get_active_policy_url(conn)
+
+
+# Согласие с политикой не отзывается, поэтому положительный ответ хранится без срока (вытесняются только
+# давно неактивные пользователи). Отрицательный ответ живет несколько секунд: он гасит серию сообщений
+# от пользователя без согласия и не мешает увидеть согласие, сохраненное другим процессом
+_policy_agreed_cache: LRUCache = LRUCache(maxsize=100_000)
+_policy_not_agreed_cache: TTLCache = TTLCache(maxsize=10_000, ttl=5)
+
+
+def mark_policy_agreed(telegram_id: int) -> None:
+    """Запоминает, что пользователь согласился с политикой конфиденциальности."""
+    _policy_not_agreed_cache.pop(telegram_id, None)
+    _policy_agreed_cache[telegram_id] = True
+
+
+@connection()
+async def has_agreed_policy(telegram_id: int, session) -> bool:
+    """Проверяет по БД, согласился ли пользователь с политикой конфиденциальности."""
+    policy_dao = AgreePolicyDAO(session)
+    policy = await policy_dao.find_one_or_none({"telegram_id": telegram_id})
+    return policy is not None
 
 
 class AgreePolicyFilter(BaseFilter):
-    @connection()
-    async def __call__(self, message: Message, session, **kwargs) -> bool:
+    async def __call__(self, message: Message, **kwargs) -> bool:
         telegram_id = message.from_user.id
+        if telegram_id in _policy_agreed_cache:
+            return True
+        if telegram_id in _policy_not_agreed_cache:
+            return False
         logger.debug(f"Проверка согласия с политикой конфиденциальности для tg_id={telegram_id}")
         try:
-            policy_dao = AgreePolicyDAO(session)
-            policy = await policy_dao.find_one_or_none(TelegramIDModel(telegram_id=telegram_id))
-            has_agreed = policy is not None
+            # Сессию открывает DbSessionMiddleware до фильтров; без нее connection() откроет свою
+            has_agreed = await has_agreed_policy(telegram_id, session=kwargs.get("session"))
+            if has_agreed:
+                mark_policy_agreed(telegram_id)
+            else:
+                _policy_not_agreed_cache[telegram_id] = True
             logger.debug(f"Пользователь tg_id={telegram_id} {'согласился' if has_agreed else 'не согласился'} "
                         f"с политикой конфиденциальности")
             return has_agreed
@@ -50,9 +117,34 @@ class AgreePolicyFilter(BaseFilter):
             return False
 
 
+# Каталог (категории и техника по категориям) меняется редко: общий для всех пользователей кэш
+# с коротким TTL, чтобы открытие списков не обращалось к БД каждый раз. Бот каталог не редактирует,
+# поэтому кэш не сбрасывается явно: изменения в БД становятся видны не позже чем через TTL
+_CATEGORIES_KEY = "categories"
+_category_list_cache: TTLCache = TTLCache(maxsize=1, ttl=60)
+_category_equipment_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+
+async def load_categories() -> list:
+    """Все категории парами (name, id) по возрастанию id; из БД не чаще раза в минуту."""
+    try:
+        return list(_category_list_cache[_CATEGORIES_KEY])
+    except KeyError:
+        pass
+    async with get_session() as session:
+        category_dao = SpecialEquipmentCategoryDAO(session)
+        names, ids = await category_dao.find_columns(
+            [Special_Equipment_Category.name, Special_Equipment_Category.id],
+            order_by=Special_Equipment_Category.id.asc()
+        )
+    categories = tuple(zip(names, ids))
+    logger.debug(f"Загруженные категории из базы данных: {categories}")
+    _category_list_cache[_CATEGORIES_KEY] = categories
+    return list(categories)
+
+
 async def async_get_category_buttons(dialog_manager: DialogManager, **kwargs) -> dict:
-    middleware_logger = dialog_manager.middleware_data.get("logger")
-    active_logger = middleware_logger if middleware_logger else logger
+    active_logger = REQUEST_LOGGER.get(logger)
     active_logger.debug("Начало выполнения async_get_category_buttons")
 
     # Параметры пагинации
@@ -65,18 +157,9 @@ async def async_get_category_buttons(dialog_manager: DialogManager, **kwargs) ->
         all_categories = dialog_manager.dialog_data[cache_key]
         active_logger.debug(f"Используются кэшированные категории (всего: {len(all_categories)})")
     else:
-        async with get_session() as session:
-            category_dao = SpecialEquipmentCategoryDAO(session)
-            # Добавляем сортировку по id в порядке возрастания
-            categories = await category_dao.find_all(order_by=Special_Equipment_Category.id.asc())
-            all_categories = [
-                (category.name, category.id) for category in categories
-                if hasattr(category, 'id') and hasattr(category, 'name')
-            ]
-            active_logger.debug(f"Загруженные категории из базы данных: {all_categories}")
-            # Сортировка на уровне Python больше не нужна, так как данные уже отсортированы
-            dialog_manager.dialog_data[cache_key] = all_categories
-            active_logger.debug(f"Кэшированы все категории: {all_categories}")
+        all_categories = await load_categories()
+        dialog_manager.dialog_data[cache_key] = all_categories
+        active_logger.debug(f"Кэшированы все категории: {all_categories}")
 
     total_categories = len(all_categories)
     total_pages = (total_categories + items_per_page - 1) // items_per_page
@@ -106,8 +189,34 @@ async def async_get_category_buttons(dialog_manager: DialogManager, **kwargs) ->
     }
 
 
+async def load_category_equipment(category_id: int) -> tuple[list, str]:
+    """Загружает список техники категории (пары (name, id)) и изображение категории в отдельной сессии.
+
+    Отдельная сессия позволяет запускать загрузку параллельно с другими запросами обработчика.
+    Результат кэшируется на минуту для всех пользователей.
+    """
+    cached = _category_equipment_cache.get(category_id)
+    if cached is not None:
+        equipment, path_image = cached
+        return list(equipment), path_image
+    async with get_session() as session:
+        equipment_dao = SpecialEquipmentDAO(session)
+        # Добавляем сортировку по id в порядке возрастания
+        names, ids = await equipment_dao.find_columns(
+            [Special_Equipment.name, Special_Equipment.id],
+            {"category_id": category_id},
+            order_by=Special_Equipment.id.asc()
+        )
+        category_dao = SpecialEquipmentCategoryDAO(session)
+        category = await category_dao.find_one_or_none({"id": category_id})
+    path_image = category.path_image if category else "https://iimg.su/i/Tx3v8r"
+    equipment = tuple(zip(names, map(str, ids)))
+    _category_equipment_cache[category_id] = (equipment, path_image)
+    return list(equipment), path_image
+
+
 async def async_get_equipment_buttons(dialog_manager: DialogManager, **kwargs) -> dict:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
 
     category_id = dialog_manager.start_data.get("category_id")
     if not category_id:
@@ -120,24 +229,18 @@ async def async_get_equipment_buttons(dialog_manager: DialogManager, **kwargs) -
     image_key = f"category_image_{category_id}"
 
     if cache_key not in dialog_manager.dialog_data:
-        async with get_session() as session:
-            equipment_dao = SpecialEquipmentDAO(session)
-            # Добавляем сортировку по id в порядке возрастания
-            equipment = await equipment_dao.find_all(
-                SpecialEquipmentCategoryCatId(category_id=category_id),
-                order_by=Special_Equipment.id.asc()
-            )
-            all_equipment = [(equip.name, str(equip.id)) for equip in equipment]
-            dialog_manager.dialog_data[cache_key] = all_equipment
-            total_pages = (len(all_equipment) + items_per_page - 1) // items_per_page
-            dialog_manager.dialog_data[pages_key] = total_pages
-
-            # Получаем path_image для категории
-            category_dao = SpecialEquipmentCategoryDAO(session)
-            category = await category_dao.find_one_or_none(SpecialEquipmentCategoryId(id=category_id))
-            path_image = category.path_image if category else "https://iimg.su/i/Tx3v8r"
-            dialog_manager.dialog_data[image_key] = path_image
-            logger_my.debug(f"Получен path_image для category_id={category_id}: {path_image}")
+        prefetched = dialog_manager.start_data.get("equipment_prefetch")
+        if prefetched is not None:
+            # Список уже загружен в on_category_click параллельно с названием категории
+            all_equipment = [tuple(item) for item in prefetched]
+            path_image = dialog_manager.start_data.get("path_image", "https://iimg.su/i/Tx3v8r")
+        else:
+            all_equipment, path_image = await load_category_equipment(category_id)
+        total_pages = (len(all_equipment) + items_per_page - 1) // items_per_page
+        dialog_manager.dialog_data[cache_key] = all_equipment
+        dialog_manager.dialog_data[pages_key] = total_pages
+        dialog_manager.dialog_data[image_key] = path_image
+        logger_my.debug(f"Получен path_image для category_id={category_id}: {path_image}")
     else:
         all_equipment = dialog_manager.dialog_data[cache_key]
         total_pages = dialog_manager.dialog_data[pages_key]
@@ -151,7 +254,7 @@ async def async_get_equipment_buttons(dialog_manager: DialogManager, **kwargs) -
 
 
 async def async_get_equipment_details(dialog_manager: DialogManager, **kwargs) -> dict:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     logger_my.debug("Calling async_get_equipment_details")
 
     start_data = dialog_manager.start_data
@@ -163,35 +266,38 @@ async def async_get_equipment_details(dialog_manager: DialogManager, **kwargs) -
             "equipment_name": "Неизвестно",
             "rental_price": 0,
             "description": "Нет данных",
-            "image_path": "https://iimg.su/i/7vTQV5"  # Значение по умолчанию
+            "image_path": MENU_PHOTO_URL  # Значение по умолчанию
         }
 
-    async with get_session() as session:
-        equipment_dao = SpecialEquipmentDAO(session)
-        equipment = await equipment_dao.find_one_or_none(SpecialEquipmentIdFilter(id=equipment_id))
-        if not equipment:
-            logger_my.error(f"Техника с id={equipment_id} не найдена")
-            return {
-                "equipment_name": "Неизвестно",
-                "rental_price": 0,
-                "description": "Нет данных",
-                "image_path": "https://iimg.su/i/7vTQV5"  # Значение по умолчанию
-            }
+    # Карточку обычно передает on_equipment_click; запрос к БД нужен только при другом пути в окно
+    card = start_data.get("equipment_card")
+    if card is None:
+        async with get_session() as session:
+            equipment_dao = SpecialEquipmentDAO(session)
+            card = await equipment_dao.find_card(equipment_id)
+    if not card:
+        logger_my.error(f"Техника с id={equipment_id} не найдена")
+        return {
+            "equipment_name": "Неизвестно",
+            "rental_price": 0,
+            "description": "Нет данных",
+            "image_path": MENU_PHOTO_URL  # Значение по умолчанию
+        }
 
-        dialog_manager.dialog_data.update({
-            "equipment_name": equipment.name,
-            "rental_price": float(equipment.rental_price_per_day)
-        })
+    dialog_manager.dialog_data.update({
+        "equipment_name": card["name"],
+        "rental_price": card["rental_price_per_day"]
+    })
 
-        # Используем image_path из базы данных или значение по умолчанию, если image_path отсутствует
-        image_path = equipment.image_path if equipment.image_path else "https://iimg.su/i/7vTQV5"
+    # Используем image_path из базы данных или значение по умолчанию, если image_path отсутствует
+    image_path = card["image_path"] if card["image_path"] else MENU_PHOTO_URL
 
-        return {
-            "equipment_name": equipment.name,
-            "rental_price": float(equipment.rental_price_per_day),
-            "description": equipment.description or "Нет описания",
-            "image_path": image_path
-        }
+    return {
+        "equipment_name": card["name"],
+        "rental_price": card["rental_price_per_day"],
+        "description": card["description"] or "Нет описания",
+        "image_path": image_path
+    }
 
 
 async def check_equipment_availability(equipment_name: str, session: AsyncSession, start_date: datetime = None, end_date: datetime = None) -> dict:
@@ -214,7 +320,7 @@ async def check_equipment_availability(equipment_name: str, session: AsyncSessio
     try:
         # Получаем ID техники по имени
         equipment_dao = SpecialEquipmentDAO(session)
-        equipment = await equipment_dao.find_one_or_none(SpecialEquipmentIdFilterName(name=equipment_name))
+        equipment = await equipment_dao.find_one_or_none({"name": equipment_name})
 
         if not equipment:
             logger.error(f"Техника с именем {equipment_name} не найдена")
@@ -235,16 +341,10 @@ async def check_equipment_availability(equipment_name: str, session: AsyncSessio
 
         # Получаем записи об аренде для техники
         rental_dao = EquipmentRentalHistoryDAO(session)
-        rentals = await rental_dao.find_all()
-        rentals = [
-            rental for rental in rentals
-            if rental.equipment_id == equipment.id
-               and rental.start_date <= end_date
-               and (rental.end_date is None or rental.end_date >= start_date)
-        ]
+        rental_starts, rental_ends = await rental_dao.find_periods(equipment.id, start_date, end_date)
+        rentals = list(zip(rental_starts, rental_ends))
 
-        logger.debug(
-            f"Найденные записи об аренде для {equipment_name}: {[(r.start_date, r.end_date) for r in rentals]}")
+        logger.debug(f"Найденные записи об аренде для {equipment_name}: {rentals}")
 
         # Создаем список дат для проверки
         all_dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
@@ -253,9 +353,9 @@ async def check_equipment_availability(equipment_name: str, session: AsyncSessio
         # Проверяем каждую дату на доступность
         for date in all_dates:
             is_date_available = True
-            for rental in rentals:
-                rental_start = rental.start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                rental_end = (rental.end_date or end_date).replace(hour=0, minute=0, second=0, microsecond=0)
+            for rental_start_date, rental_end_date in rentals:
+                rental_start = rental_start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+                rental_end = (rental_end_date or end_date).replace(hour=0, minute=0, second=0, microsecond=0)
 
                 if rental_start <= date <= rental_end:
                     is_date_available = False
@@ -290,9 +390,18 @@ async def check_equipment_availability(equipment_name: str, session: AsyncSessio
         }
 
 
+# Обычные разделители в номерах удаляются через str.translate, регулярное выражение нужно только для остальных
+_PHONE_SEPARATORS = str.maketrans("", "", " +-()")
+_NON_DIGITS = re.compile(r'\D', re.ASCII)
+
+
 def validate_phone_number(phone: str) -> Optional[str]:
     # Удаляем все нечисловые символы
-    digits = re.sub(r'\D', '', phone)
+    digits = phone.translate(_PHONE_SEPARATORS)
+    if not (digits.isascii() and digits.isdigit()):
+        digits = _NON_DIGITS.sub('', phone)
+    if not 10 <= len(digits) <= 12:
+        return None
     # Проверяем различные варианты ввода
     if len(digits) == 11 and digits[0] in ['7', '8']:
         return '+7' + digits[1:]
@@ -1,17 +1,15 @@
 import asyncio
 
 from datetime import datetime, timedelta, date
-from decimal import Decimal, ROUND_DOWN
 from typing import Dict, Any, List, Callable, Optional, Sequence
 
-from aiogram.types import InlineKeyboardButton, CallbackQuery, InlineKeyboardMarkup, LabeledPrice, PreCheckoutQuery, \
-    SuccessfulPayment
+from aiogram.types import InlineKeyboardButton, CallbackQuery, InlineKeyboardMarkup, LabeledPrice
 from aiogram.enums import ContentType
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram_dialog import Window, DialogManager, StartMode
 from aiogram_dialog.api.entities import ChatEvent
 from aiogram_dialog.widgets.kbd import Calendar, CalendarConfig, CalendarScope, CalendarUserConfig, SwitchTo, Back, \
-    Button, Cancel
+    Button
 from aiogram_dialog.widgets.kbd.calendar_kbd import CalendarScopeView, CalendarMonthView, CalendarYearsView
 from aiogram_dialog.widgets.text import Const, Format, Text
 from aiogram_dialog.widgets.media import StaticMedia
@@ -24,13 +22,14 @@ from app.core.database import get_session, connection
 from app.handlers.dao import SpecialEquipmentDAO, RequestStatusDAO, RequestDAO, CompanyContactDAO, \
     EquipmentRentalHistoryDAO, PaymentTransactionDAO
 from app.handlers.models import Request, Equipment_Rental_History, PaymentTransaction
-from app.handlers.schemas import SpecialEquipmentIdFilterName, RequestStatusBase, RequestBase, RequestUpdate, \
-    RequestFilter
+from app.handlers.schemas import RequestStatusBase, RequestUpdate, RequestFilter
 from app.handlers.user.keyboards import paginated_requests_by_equipment, paginated_requests_by_date, \
     paginated_pending_payment_requests, paginated_paid_invoices, paginated_requests_in_progress, \
     paginated_requests_completed
-from app.utils.logging import get_logger
-from app.handlers.user.utils import check_equipment_availability, get_active_policy_url
+from app.handlers.user.media import MENU_PHOTO, MENU_PHOTO_URL, EQUIPMENT_PHOTO
+from app.utils.logging import get_logger, REQUEST_LOGGER
+from app.utils.money import to_kopecks, format_kopecks
+from app.handlers.user.utils import check_equipment_availability, cached_active_policy_url
 from app.config import settings
 
 logger = get_logger(__name__)
@@ -52,6 +51,8 @@ class CustomText(Text):
 
 
 class EmptyView:
+    __slots__ = ()
+
     async def render(self, config: CalendarConfig, offset: date, data: dict, manager: DialogManager) -> List[
         List[InlineKeyboardButton]]:
         return [[]]
@@ -105,6 +106,11 @@ class MainDialogStates(StatesGroup):
 
 
 class CustomCalendarDaysView:
+    __slots__ = (
+        "callback_generator", "available_dates_getter", "calendar_id", "date_text", "today_text",
+        "weekday_text", "header_text", "next_month_text", "prev_month_text",
+    )
+
     def __init__(
             self,
             callback_generator: Callable[[str], str],
@@ -381,7 +387,7 @@ class CustomRentalCalendar(Calendar):
 
 
 async def confirmation_getter(dialog_manager: DialogManager, **kwargs) -> dict:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     logger_my.debug("Calling confirmation_getter")
 
     equipment_name = dialog_manager.dialog_data.get("equipment_name", "Неизвестно")
@@ -398,17 +404,17 @@ async def confirmation_getter(dialog_manager: DialogManager, **kwargs) -> dict:
     if dialog_manager.current_context().state == MainDialogStates.confirm_select_equipment:
         async with get_session() as session:
             equipment_dao = SpecialEquipmentDAO(session)
-            equipment = await equipment_dao.find_one_or_none(SpecialEquipmentIdFilterName(name=equipment_name))
+            equipment = await equipment_dao.find_one_or_none({"name": equipment_name})
             if not equipment:
                 logger_my.error(f"Техника с именем {equipment_name} не найдена")
                 return {
                     "equipment_name": equipment_name,
                     "rental_price": 0,
                     "selected_date": selected_date,
-                    "image_path": "https://iimg.su/i/7vTQV5",
+                    "image_path": MENU_PHOTO_URL,
                 }
 
-            image_path = equipment.image_path if equipment.image_path else "https://iimg.su/i/7vTQV5"
+            image_path = equipment.image_path if equipment.image_path else MENU_PHOTO_URL
 
             return {
                 "equipment_name": equipment_name,
@@ -422,7 +428,7 @@ async def confirmation_getter(dialog_manager: DialogManager, **kwargs) -> dict:
         "selected_date": selected_date,
         "phone_number": dialog_manager.dialog_data.get("phone_number", "Не указан"),
         "address": dialog_manager.dialog_data.get("address", "Не указан"),
-        "image_path": "https://iimg.su/i/7vTQV5",
+        "image_path": MENU_PHOTO_URL,
     }
 
 
@@ -435,10 +441,7 @@ def create_confirmation_window(
         use_equipment_image: bool = False,
 ) -> Window:
     widgets = [
-        StaticMedia(
-            url=Format("{image_path}") if use_equipment_image else "https://iimg.su/i/7vTQV5",
-            type=ContentType.PHOTO,
-        ),
+        EQUIPMENT_PHOTO if use_equipment_image else MENU_PHOTO,
         Const(text),
     ]
 
@@ -461,7 +464,7 @@ def create_confirmation_window(
 
 
 async def on_today_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     today = datetime.now().date()
     dialog_manager.dialog_data["selected_date"] = today.isoformat()
     logger_my.debug(f"Выбрана дата: {today}")
@@ -470,7 +473,7 @@ async def on_today_click(callback: CallbackQuery, button, dialog_manager: Dialog
 
 
 async def on_tomorrow_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     tomorrow = datetime.now().date() + timedelta(days=1)
     dialog_manager.dialog_data["selected_date"] = tomorrow.isoformat()
     logger_my.debug(f"Выбрана дата: {tomorrow}")
@@ -479,7 +482,7 @@ async def on_tomorrow_click(callback: CallbackQuery, button, dialog_manager: Dia
 
 
 async def on_day_after_tomorrow_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     day_after_tomorrow = datetime.now().date() + timedelta(days=2)
     dialog_manager.dialog_data["selected_date"] = day_after_tomorrow.isoformat()
     logger_my.debug(f"Выбрана дата: {day_after_tomorrow}")
@@ -488,7 +491,7 @@ async def on_day_after_tomorrow_click(callback: CallbackQuery, button, dialog_ma
 
 
 async def on_select_date_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     logger_my.debug("Переход к выбору даты через календарь")
     data = dialog_manager.dialog_data
     await dialog_manager.start(
@@ -509,7 +512,7 @@ async def enter_phone_getter(dialog_manager: DialogManager, **kwargs) -> Dict[st
 
 
 async def availability_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     equipment_name = dialog_manager.dialog_data.get("equipment_name", "Неизвестно")
 
     # Retrieve the offset as a string from dialog_data
@@ -580,7 +583,7 @@ async def availability_getter(dialog_manager: DialogManager, **kwargs) -> Dict[s
 
 def create_rental_calendar_window(state: State, calendar_state: State, confirm_state: State) -> Window:
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Format("{message}", when=lambda data, widget, manager: not data["is_available"]),
         Const("Когда вам нужна спецтехника?", when=lambda data, widget, manager: data["is_available"]),
         Button(
@@ -610,7 +613,7 @@ def create_rental_calendar_window(state: State, calendar_state: State, confirm_s
 
 def create_calendar_view_window(state: State, confirm_state: State) -> Window:
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Format("{message}", when=lambda data, widget, manager: not data["is_available"]),
         Const("Выберите дату аренды:"),
         CustomRentalCalendar(
@@ -649,7 +652,7 @@ async def create_request_getter(dialog_manager: DialogManager, **kwargs) -> Dict
 
 
 async def on_cancel_by_date_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     logger_my.debug(f"Пользователь {dialog_manager.event.from_user.id} выбрал отмену аренды по дате")
     await dialog_manager.start(
         state=MainDialogStates.cancel_by_date,
@@ -659,7 +662,7 @@ async def on_cancel_by_date_click(callback: CallbackQuery, button, dialog_manage
 
 
 async def on_cancel_by_equipment_click(callback: CallbackQuery, button, dialog_manager: DialogManager) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     logger_my.debug(f"Пользователь {dialog_manager.event.from_user.id} выбрал отмену аренды по названию спецтехники")
     await dialog_manager.start(
         state=MainDialogStates.cancel_by_equipment,
@@ -671,10 +674,7 @@ async def on_cancel_by_equipment_click(callback: CallbackQuery, button, dialog_m
 def create_cancel_rent_window(state: State) \
         -> Window:
     return Window(
-        StaticMedia(
-            url="https://iimg.su/i/7vTQV5",
-            type=ContentType.PHOTO
-        ),
+        MENU_PHOTO,
         Const("Выберите способ отмены аренды:"),
         Button(
             text=Const("По дате 📅"),
@@ -692,7 +692,7 @@ def create_cancel_rent_window(state: State) \
 
 
 async def cancel_by_date_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user = dialog_manager.event.from_user
     tg_id = user.id
     items_per_page = 5
@@ -709,13 +709,14 @@ async def cancel_by_date_getter(dialog_manager: DialogManager, **kwargs) -> Dict
                 return {"requests": [], "total_pages": 1}
 
             request_dao = RequestDAO(session)
-            requests = await request_dao.find_all(
+            dates, ids = await request_dao.find_columns(
+                [Request.selected_date, Request.id],
                 filters={"tg_id": tg_id, "status_id": status.id},
                 order_by=Request.selected_date.asc()
             )
             all_requests = [
-                (request.selected_date.strftime("%d.%m.%Y"), str(request.id))
-                for request in requests
+                (selected_date.strftime("%d.%m.%Y"), str(request_id))
+                for selected_date, request_id in zip(dates, ids)
             ]
             dialog_manager.dialog_data[cache_key] = all_requests
             logger_my.debug(f"Заявки для tg_id={tg_id} закэшированы: {all_requests}")
@@ -738,7 +739,7 @@ async def cancel_by_date_getter(dialog_manager: DialogManager, **kwargs) -> Dict
 
 
 async def cancel_by_equipment_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user = dialog_manager.event.from_user
     tg_id = user.id
     items_per_page = 5
@@ -758,14 +759,12 @@ async def cancel_by_equipment_getter(dialog_manager: DialogManager, **kwargs) ->
                 return {"requests": [], "total_pages": 1}
 
             request_dao = RequestDAO(session)
-            requests = await request_dao.find_all(
+            names, ids = await request_dao.find_columns(
+                [Request.equipment_name, Request.id],
                 filters={"tg_id": tg_id, "status_id": status.id},
                 order_by=Request.equipment_name.asc()
             )
-            all_requests = [
-                (request.equipment_name, str(request.id))
-                for request in requests
-            ]
+            all_requests = list(zip(names, map(str, ids)))
             dialog_manager.dialog_data[cache_key] = all_requests
             logger_my.debug(f"Requests for tg_id={tg_id} cached: {all_requests}")
 
@@ -781,7 +780,7 @@ async def cancel_by_equipment_getter(dialog_manager: DialogManager, **kwargs) ->
 
 @connection()
 async def on_cancel_all_requests_click(callback: CallbackQuery, button, dialog_manager: DialogManager, session) -> None:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user = dialog_manager.event.from_user
     tg_id = user.id
 
@@ -818,7 +817,7 @@ async def on_cancel_all_requests_click(callback: CallbackQuery, button, dialog_m
     await callback.answer()
 
 
-async def request_details_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
+async def cancel_request_details_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
     request_id = dialog_manager.dialog_data.get("selected_request_id")
     async with get_session() as session:
         request_dao = RequestDAO(session)
@@ -926,7 +925,7 @@ async def on_request_equipment_click(callback: CallbackQuery, widget, manager: D
 
 
 request_details_window = Window(
-    StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+    MENU_PHOTO,
     Format("Детали заявки:"),
     Format("Техника: {equipment_name}"),
     Format("Дата: {selected_date}"),
@@ -938,11 +937,11 @@ request_details_window = Window(
     Button(Const("Удалить заявку 🗑️"), id="delete_request", on_click=on_delete_request_click),
     SwitchTo(text=Const("Выбрать способ отмены аренды"), state=MainDialogStates.cancel_rent, id='back_menu_cancel'),
     state=MainDialogStates.view_request_details,
-    getter=request_details_getter
+    getter=cancel_request_details_getter
 )
 
 confirm_delete_window = Window(
-    StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+    MENU_PHOTO,
     Const("Вы уверены, что хотите отменить эту заявку?"),
     Button(Const("Да, удалить"), id="confirm_delete", on_click=on_confirm_delete_click),
     Button(Const("Нет, отменить"), id="cancel_delete", on_click=on_cancel_delete_click),
@@ -950,7 +949,7 @@ confirm_delete_window = Window(
 )
 
 confirm_delete_all_window = Window(
-    StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+    MENU_PHOTO,
     Const("Вы уверены, что хотите отменить все ваши заявки?"),
     Button(Const("Да, удалить все"), id="confirm_delete_all", on_click=on_confirm_delete_all_click),
     Button(Const("Нет, отменить"), id="cancel_delete_all", on_click=on_cancel_delete_all_click),
@@ -960,7 +959,7 @@ confirm_delete_all_window = Window(
 
 def create_cancel_by_date_window(state: State) -> Window:
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Const("Выберите заявку для отмены (по дате):"),
         paginated_requests_by_date(on_request_date_click),
         Const("Заявок нет", when=lambda data, widget, manager: not data.get("requests")),
@@ -974,7 +973,7 @@ def create_cancel_by_date_window(state: State) -> Window:
 
 def create_cancel_by_equipment_window(state: State) -> Window:
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Const("Выберите заявку для отмены (по спецтехнике):"),
         paginated_requests_by_equipment(on_request_equipment_click),
         Const("Заявок нет", when=lambda data, widget, manager: not data.get("requests")),
@@ -988,10 +987,7 @@ def create_cancel_by_equipment_window(state: State) -> Window:
 
 def create_more_menu_window(state: State) -> Window:
     return Window(
-        StaticMedia(
-            url="https://iimg.su/i/7vTQV5",
-            type=ContentType.PHOTO
-        ),
+        MENU_PHOTO,
         Const("Дополнительная информация:"),
         SwitchTo(
             text=Const("Контакты 📞"),
@@ -1008,9 +1004,9 @@ def create_more_menu_window(state: State) -> Window:
 
 
 async def contacts_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     async with get_session() as session:
-        policy_url = await get_active_policy_url(session)
+        policy_url = await cached_active_policy_url(session)
         contact_dao = CompanyContactDAO(session)
         contact = await contact_dao.get_active_contact()
         if not contact:
@@ -1027,7 +1023,7 @@ async def contacts_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str,
                 "website": None,
                 "social_media": None,
                 "requisites": None,
-                "image_url": "https://iimg.su/i/7vTQV5"
+                "image_url": MENU_PHOTO_URL
             }
         return {
             "policy_url": policy_url,
@@ -1142,7 +1138,7 @@ def create_contacts_window(state: State) -> Window:
 
 
 async def pending_payment_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user = dialog_manager.event.from_user
     tg_id = user.id
     items_per_page = 5
@@ -1169,7 +1165,7 @@ async def pending_payment_getter(dialog_manager: DialogManager, **kwargs) -> Dic
             all_requests = []
             for request in requests:
                 equipment = await special_equipment_dao.find_one_or_none(
-                    SpecialEquipmentIdFilterName(name=request.equipment_name))
+                    {"name": request.equipment_name})
                 if not equipment:
                     logger_my.warning(f"Спецтехника с именем {request.equipment_name} не найдена")
                     continue
@@ -1213,7 +1209,7 @@ def create_pending_payment_window(state: State) -> Window:
         await manager.switch_to(MainDialogStates.payment_details)
 
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Const("Ваши заявки, ожидающие оплаты:"),
         paginated_pending_payment_requests(on_pending_payment_click),
         Const("Заявок нет", when=lambda data, widget, manager: not data.get("requests")),
@@ -1223,32 +1219,36 @@ def create_pending_payment_window(state: State) -> Window:
     )
 
 
-async def calculate_total_cost(rental: Equipment_Rental_History) -> Decimal:
-    """Рассчитывает общую стоимость аренды на основе rental_price_at_time и total_work_time."""
+async def calculate_total_cost(rental: Equipment_Rental_History) -> int:
+    """Рассчитывает общую стоимость аренды в копейках на основе rental_price_at_time и total_work_time.
+
+    Цена переводится в копейки один раз, дальше расчет идет в целых числах: стоимость за минуты
+    округляется вниз до копейки без промежуточных дробей.
+    """
     if not rental.rental_price_at_time:
         logger.error(f"rental_price_at_time is None for rental_id={rental.id}")
-        return Decimal('0.00')
+        return 0
 
-    price_per_hour = rental.rental_price_at_time
+    price_per_hour_kopecks = to_kopecks(rental.rental_price_at_time)
 
     if not rental.total_work_time:
         logger.warning(f"total_work_time is None for rental_id={rental.id}, assuming 24 hours")
-        total_hours = Decimal('24')
+        total_minutes = 24 * 60
     else:
         try:
             hours, minutes = map(int, rental.total_work_time.split(':'))
-            total_hours = Decimal(str(hours)) + (Decimal(str(minutes)) / Decimal('60'))
+            total_minutes = hours * 60 + minutes
         except ValueError as e:
             logger.error(f"Invalid total_work_time format '{rental.total_work_time}' for rental_id={rental.id}: {e}")
-            total_hours = Decimal('24')
+            total_minutes = 24 * 60
 
-    total_cost = (price_per_hour * total_hours).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
-    logger.debug(f"Calculated total cost for rental_id={rental.id}: {total_cost}")
-    return total_cost
+    total_cost_kopecks = price_per_hour_kopecks * total_minutes // 60
+    logger.debug(f"Calculated total cost for rental_id={rental.id}: {total_cost_kopecks} kopeks")
+    return total_cost_kopecks
 
 
 async def payment_details_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     request_id = dialog_manager.dialog_data.get("selected_request_id")
     # Initialize payment_status dictionary if not present
     if "payment_status" not in dialog_manager.dialog_data:
@@ -1265,7 +1265,7 @@ async def payment_details_getter(dialog_manager: DialogManager, **kwargs) -> Dic
             return {"error": "Заявка не найдена"}
 
         equipment_dao = SpecialEquipmentDAO(session)
-        equipment = await equipment_dao.find_one_or_none(SpecialEquipmentIdFilterName(name=request.equipment_name))
+        equipment = await equipment_dao.find_one_or_none({"name": request.equipment_name})
         if not equipment:
             logger_my.warning(f"Спецтехника с именем {request.equipment_name} не найдена")
             return {"error": "Техника не найдена"}
@@ -1279,14 +1279,13 @@ async def payment_details_getter(dialog_manager: DialogManager, **kwargs) -> Dic
             logger_my.warning(f"Не найдена история аренды для equipment_id={equipment.id} или end_date отсутствует")
             return {"error": "Данные об аренде не найдены"}
 
-        total_cost = await calculate_total_cost(rental)
-        total_cost_kopecks = int(total_cost * Decimal('100'))
+        total_cost_kopecks = await calculate_total_cost(rental)
         if total_cost_kopecks <= 0:
             logger_my.error(f"Invalid total_cost_kopecks={total_cost_kopecks} for request {request_id}")
             return {"error": "Недопустимая сумма оплаты"}
 
         logger_my.debug(
-            f"Calculated total cost for request {request_id}: {total_cost} RUB ({total_cost_kopecks} kopeks)")
+            f"Calculated total cost for request {request_id}: {total_cost_kopecks} kopeks")
 
         # Проверяем наличие транзакции по telegram_id
         payment_transaction_dao = PaymentTransactionDAO(session)
@@ -1304,7 +1303,7 @@ async def payment_details_getter(dialog_manager: DialogManager, **kwargs) -> Dic
             "first_name": request.first_name,
             "username": request.username or "Не указан",
             "status": request.status.name if request.status else "Неизвестно",
-            "total_cost": float(total_cost),
+            "total_cost": format_kopecks(total_cost_kopecks),
             "total_cost_kopecks": total_cost_kopecks,
             "provider_token": settings.provider_token,
             "currency": settings.currency,
@@ -1315,7 +1314,7 @@ async def payment_details_getter(dialog_manager: DialogManager, **kwargs) -> Dic
 
 @connection()
 async def on_pay_now_click(callback: CallbackQuery, button: Button, manager: DialogManager, session) -> None:
-    logger_my = manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     data = await payment_details_getter(manager)
     if "error" in data:
         await callback.message.answer(f"Ошибка: {data['error']}")
@@ -1395,7 +1394,7 @@ async def on_pay_now_click(callback: CallbackQuery, button: Button, manager: Dia
 
 
 async def payment_details_getter_with_check(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     request_id = dialog_manager.dialog_data.get("selected_request_id")
     async with get_session() as session:
         request_dao = RequestDAO(session)
@@ -1408,7 +1407,7 @@ async def payment_details_getter_with_check(dialog_manager: DialogManager, **kwa
             return {"error": "Заявка не найдена"}
 
         equipment_dao = SpecialEquipmentDAO(session)
-        equipment = await equipment_dao.find_one_or_none(SpecialEquipmentIdFilterName(name=request.equipment_name))
+        equipment = await equipment_dao.find_one_or_none({"name": request.equipment_name})
         if not equipment:
             logger_my.warning(f"Спецтехника с именем {request.equipment_name} не найдена")
             return {"error": "Техника не найдена"}
@@ -1422,14 +1421,13 @@ async def payment_details_getter_with_check(dialog_manager: DialogManager, **kwa
             logger_my.warning(f"Не найдена история аренды для equipment_id={equipment.id} или end_date отсутствует")
             return {"error": "Данные об аренде не найдены"}
 
-        total_cost = await calculate_total_cost(rental)
-        total_cost_kopecks = int(total_cost * Decimal('100'))
+        total_cost_kopecks = await calculate_total_cost(rental)
         if total_cost_kopecks <= 0:
             logger_my.error(f"Invalid total_cost_kopecks={total_cost_kopecks} for request {request_id}")
             return {"error": "Недопустимая сумма оплаты"}
 
         logger_my.debug(
-            f"Calculated total cost for request {request_id}: {total_cost} RUB ({total_cost_kopecks} kopeks)")
+            f"Calculated total cost for request {request_id}: {total_cost_kopecks} kopeks")
 
         # Проверяем статус оплаты через PaymentTransaction или флаг invoice_sent
         payment_transaction_dao = PaymentTransactionDAO(session)
@@ -1447,7 +1445,7 @@ async def payment_details_getter_with_check(dialog_manager: DialogManager, **kwa
             "first_name": request.first_name,
             "username": request.username or "Не указан",
             "status": request.status.name if request.status else "Неизвестно",
-            "total_cost": float(total_cost),
+            "total_cost": format_kopecks(total_cost_kopecks),
             "total_cost_kopecks": total_cost_kopecks,
             "provider_token": settings.provider_token,
             "currency": settings.currency,
@@ -1458,7 +1456,7 @@ async def payment_details_getter_with_check(dialog_manager: DialogManager, **kwa
 
 def create_payment_window(state: State) -> Window:
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Const("Детали оплаты заявки:"),
         Format("Техника: {equipment_name}"),
         Format("Дата начала: {selected_date}"),
@@ -1522,7 +1520,7 @@ async def get_user_payment_transactions(telegram_id: int, session) -> Sequence[R
 
 
 async def paid_invoices_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user = dialog_manager.event.from_user
     tg_id = user.id
     items_per_page = 5
@@ -1533,13 +1531,14 @@ async def paid_invoices_getter(dialog_manager: DialogManager, **kwargs) -> Dict[
     if force_refresh or cache_key not in dialog_manager.dialog_data:
         async with get_session() as session:
             payment_dao = PaymentTransactionDAO(session)
-            transactions = await payment_dao.find_all(
+            dates, ids = await payment_dao.find_columns(
+                [PaymentTransaction.created_at, PaymentTransaction.id],
                 filters={"telegram_id": tg_id, "status": "success"},
                 order_by=PaymentTransaction.created_at.desc()
             )
             all_transactions = [
-                (transaction.created_at.strftime("%d.%m.%Y %H:%M"), str(transaction.id))
-                for transaction in transactions
+                (created_at.strftime("%d.%m.%Y %H:%M"), str(transaction_id))
+                for created_at, transaction_id in zip(dates, ids)
             ]
             dialog_manager.dialog_data[cache_key] = all_transactions
             logger_my.debug(f"Транзакции для tg_id={tg_id} закэшированы: {len(all_transactions)} записей")
@@ -1567,7 +1566,7 @@ def create_paid_invoices_window(state: State) -> Window:
         await manager.switch_to(MainDialogStates.paid_invoice_details)
 
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Const("Ваши оплаченные счета:"),
         paginated_paid_invoices(on_transaction_click),
         Const("Счетов нет", when=lambda data, widget, manager: not data.get("transactions")),
@@ -1586,7 +1585,7 @@ async def paid_invoice_details_getter(dialog_manager: DialogManager, **kwargs) -
             return {"error": "Транзакция не найдена"}
         return {
             "transaction_id": transaction.transaction_id,
-            "amount": float(transaction.amount),
+            "amount": format_kopecks(to_kopecks(transaction.amount)),
             "status": "Оплачено" if transaction.status == "success" else transaction.status,
             "created_at": transaction.created_at.strftime("%d.%m.%Y %H:%M"),
         }
@@ -1594,7 +1593,7 @@ async def paid_invoice_details_getter(dialog_manager: DialogManager, **kwargs) -
 
 def create_paid_invoice_details_window(state: State) -> Window:
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Const("Детали оплаченного счета:"),
         Format("ID транзакции: {transaction_id}"),
         Format("Сумма: {amount} руб."),
@@ -1608,7 +1607,7 @@ def create_paid_invoice_details_window(state: State) -> Window:
 
 def create_my_requests_window(state: State) -> Window:
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Const("Мои заявки:"),
         SwitchTo(text=Const("В работе"), id="in_progress", state=MainDialogStates.requests_in_progress),
         SwitchTo(text=Const("Завершенные"), id="completed", state=MainDialogStates.requests_completed),
@@ -1626,7 +1625,7 @@ async def requests_completed_getter(dialog_manager: DialogManager, **kwargs) ->
 
 
 async def get_requests_by_status(dialog_manager: DialogManager, status_name: str) -> Dict[str, Any]:
-    logger_my = dialog_manager.middleware_data.get("logger") or logger
+    logger_my = REQUEST_LOGGER.get(logger)
     user = dialog_manager.event.from_user
     tg_id = user.id
     items_per_page = 5
@@ -1643,14 +1642,12 @@ async def get_requests_by_status(dialog_manager: DialogManager, status_name: str
                 return {"requests": [], "total_pages": 1}
 
             request_dao = RequestDAO(session)
-            requests = await request_dao.find_all(
+            names, ids = await request_dao.find_columns(
+                [Request.equipment_name, Request.id],
                 filters={"tg_id": tg_id, "status_id": status.id},
                 order_by=Request.selected_date.desc()
             )
-            all_requests = [
-                (request.equipment_name, str(request.id))
-                for request in requests
-            ]
+            all_requests = list(zip(names, map(str, ids)))
             dialog_manager.dialog_data[cache_key] = all_requests
             logger_my.debug(
                 f"Заявки со статусом '{status_name}' для tg_id={tg_id} закэшированы: {len(all_requests)} записей")
@@ -1679,7 +1676,7 @@ def create_requests_in_progress_window(state: State) -> Window:
         await manager.switch_to(MainDialogStates.request_details)
 
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Const("Заявки в работе:"),
         paginated_requests_in_progress(on_request_click),
         Const("Заявок нет", when=lambda data, widget, manager: not data.get("requests")),
@@ -1695,7 +1692,7 @@ def create_requests_completed_window(state: State) -> Window:
         await manager.switch_to(MainDialogStates.request_details)
 
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Const("Завершенные заявки:"),
         paginated_requests_completed(on_request_click),
         Const("Заявок нет", when=lambda data, widget, manager: not data.get("requests")),
@@ -1740,7 +1737,7 @@ async def get_status_name(status_id: int, session) -> str:
 
 def create_request_details_window(state: State) -> Window:
     return Window(
-        StaticMedia(url="https://iimg.su/i/7vTQV5", type=ContentType.PHOTO),
+        MENU_PHOTO,
         Const("Детали заявки:"),
         Format("{error}", when="error"),
         Format("Техника: {equipment_name}", when=lambda data, widget, manager: not data.get("error")),
@@ -1,3 +1,5 @@
 from .logging_middleware import LoggingMiddleware
+from .rate_limit_middleware import SendRateLimitMiddleware
+from .db_session_middleware import DbSessionMiddleware
 
-__all__ = ["LoggingMiddleware"]
\ No newline at end of file
+__all__ = ["LoggingMiddleware", "SendRateLimitMiddleware", "DbSessionMiddleware"]
\ No newline at end of file
@@ -0,0 +1,23 @@
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.core.database import get_session
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Middleware, открывающая одну сессию БД на всё обновление.
+
+    Регистрируется как внешняя (outer) middleware обновлений, то есть до фильтров: сессию из data["session"]
+    получают и фильтры, и обработчики с параметром session, а декоратор connection() переиспользует ее вместо
+    открытия новой. AsyncSession берет соединение из пула только при первом запросе и возвращает его после
+    commit/rollback, поэтому обновления без обращений к БД соединение не занимают.
+
+    Фиксация в конце обновления - только страховка: connection() завершает транзакцию сразу после
+    декорированного вызова, а код, работающий с data["session"] напрямую, должен сам вызвать commit()
+    до отрисовки диалога и отправки сообщений, иначе соединение будет простаивать в транзакции.
+    """
+
+    async def __call__(self, handler, event: TelegramObject, data: dict):
+        async with get_session() as session:
+            data["session"] = session
+            return await handler(event, data)
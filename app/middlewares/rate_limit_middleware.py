@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod, SendMessage, SendPhoto, SendDocument, SendMediaGroup, SendInvoice, \
+    EditMessageText, EditMessageMedia, EditMessageCaption, EditMessageReplyMarkup, CopyMessage, ForwardMessage, \
+    DeleteMessage
+from aiogram.methods.base import TelegramType
+from cachetools import TTLCache
+
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Методы, на которые распространяются лимиты Telegram на отправку сообщений в чат. Удаление тоже ограничивается:
+# /start удаляет старые меню пачкой, и без ведра чата такие серии упираются в 429
+_CHAT_THROTTLED_METHODS = (SendMessage, SendPhoto, SendDocument, SendMediaGroup, SendInvoice, CopyMessage,
+                           ForwardMessage, DeleteMessage)
+# Каждый переход в aiogram_dialog - редактирование сообщения: ведро чата (1 в секунду) тормозило бы навигацию,
+# поэтому правки учитываются только в общем лимите бота
+_GLOBAL_THROTTLED_METHODS = (EditMessageText, EditMessageMedia, EditMessageCaption, EditMessageReplyMarkup)
+
+
+class TokenBucket:
+    """Простое ведро токенов: rate токенов в секунду, не больше capacity накопленных."""
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class SendRateLimitMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота, удерживающая исходящие сообщения в лимитах Bot API.
+
+    Общий лимит - около 30 сообщений в секунду на бота, в личный чат - около 1 в секунду,
+    в группу - 20 в минуту. Редактирование сообщений учитывается только в общем лимите.
+    Запросы сверх лимита ждут свободного токена вместо ответа 429.
+    Если Telegram все же ответил 429 (TelegramRetryAfter), все запросы бота приостанавливаются
+    на retry_after секунд, после чего запрос повторяется (не более max_retries раз).
+    """
+
+    def __init__(self, global_rate: float = 30, private_rate: float = 1, group_rate: float = 20 / 60,
+                 max_retries: int = 2):
+        self._global = TokenBucket(global_rate, global_rate)
+        self._max_retries = max_retries
+        # Момент (time.monotonic), до которого Telegram попросил не отправлять запросы
+        self._paused_until = 0.0
+        self._private_rate = private_rate
+        self._group_rate = group_rate
+        # Ведра неактивных чатов вытесняются; новое ведро создается полным, что не нарушает лимиты
+        self._chats: TTLCache = TTLCache(maxsize=10_000, ttl=120)
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if str(chat_id).startswith("-"):
+                bucket = TokenBucket(self._group_rate, 20)
+            else:
+                bucket = TokenBucket(self._private_rate, 3)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    async def __call__(
+            self,
+            make_request: NextRequestMiddlewareType[TelegramType],
+            bot: Bot,
+            method: TelegramMethod[TelegramType],
+    ):
+        chat_id = getattr(method, "chat_id", None)
+        chat_throttled = chat_id is not None and isinstance(method, _CHAT_THROTTLED_METHODS)
+        global_throttled = chat_throttled or isinstance(method, _GLOBAL_THROTTLED_METHODS)
+        attempt = 0
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if chat_throttled:
+                await self._chat_bucket(chat_id).acquire()
+            if global_throttled:
+                await self._global.acquire()
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self._max_retries:
+                    raise
+                attempt += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                logger.warning("Telegram ограничил запросы (%s), пауза %s с перед повтором %s",
+                               type(method).__name__, e.retry_after, attempt)
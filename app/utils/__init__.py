@@ -1,5 +1,5 @@
-from .logging import setup_logging, get_logger
+from .logging import setup_logging, get_logger, REQUEST_LOGGER
 from .create_table_db import init_db
 from .utils import generate_default_equipment
 
-__all__ = ["setup_logging", "get_logger", "init_db", 'generate_default_equipment']
+__all__ = ["setup_logging", "get_logger", "REQUEST_LOGGER", "init_db", 'generate_default_equipment']
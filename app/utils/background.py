@@ -0,0 +1,27 @@
+import asyncio
+from typing import Coroutine, Any
+
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Ссылки на запущенные фоновые задачи: event loop хранит задачи только по слабым ссылкам,
+# и без этого множества незавершенная задача может быть собрана сборщиком мусора
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _on_task_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.error(f"Ошибка в фоновой задаче {task.get_name()}: {error}", exc_info=error)
+
+
+def run_in_background(coro: Coroutine[Any, Any, Any], name: str | None = None) -> asyncio.Task:
+    """Запускает корутину в фоне, не дожидаясь ее завершения; ошибки пишутся в лог."""
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_task_done)
+    return task
@@ -1,17 +1,88 @@
+from sqlalchemy import text
+
 from app.core.database import engine, Base
 
 from app.handlers.user.models import Agree_Policy
-from app.handlers.models import Privacy_Policy, Special_Equipment_Category, Special_Equipment, Equipment_Rental_History
+from app.handlers.models import Privacy_Policy, Special_Equipment_Category, Special_Equipment, Equipment_Rental_History, \
+    CompanyContact
+from app.handlers.dao import COMPANY_CONTACTS_CHANNEL
 from app.utils import get_logger
 
 logger = get_logger(__name__)
 
+# Триггер уведомляет бота об изменении контактной информации (в том числе из админ-панели),
+# чтобы сбросить кэш активного контакта без ожидания истечения TTL.
+COMPANY_CONTACTS_NOTIFY_DDL = (
+    f"""
+    CREATE OR REPLACE FUNCTION notify_company_contacts_changed() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('{COMPANY_CONTACTS_CHANNEL}', '');
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS company_contacts_changed ON company_contacts",
+    """
+    CREATE TRIGGER company_contacts_changed
+    AFTER INSERT OR UPDATE OR DELETE ON company_contacts
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_company_contacts_changed()
+    """,
+)
+
+# create_all не меняет уже существующие таблицы, поэтому схему agree_policys приводим вручную:
+# снимаем уникальность с name и создаем уникальный индекс по telegram_id
+# (на него опирается INSERT ... ON CONFLICT в AgreePolicyDAO.add_if_absent).
+# Пока уникального индекса нет, в таблице могут быть повторные согласия: они удаляются (остается самое раннее),
+# а обычный индекс с тем же именем, если он есть, заменяется уникальным.
+AGREE_POLICYS_DDL = (
+    "ALTER TABLE agree_policys DROP CONSTRAINT IF EXISTS agree_policys_name_key",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indrelid = 'agree_policys'::regclass
+              AND i.indisunique
+              AND i.indnatts = 1
+              AND a.attname = 'telegram_id'
+        ) THEN
+            DELETE FROM agree_policys a
+            USING agree_policys b
+            WHERE a.telegram_id = b.telegram_id AND a.id > b.id;
+            DROP INDEX IF EXISTS ix_agree_policys_telegram_id;
+        END IF;
+    END
+    $$
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_agree_policys_telegram_id ON agree_policys (telegram_id)",
+)
+
+# Значения по умолчанию для ссылок на изображения задаются только на стороне сервера (server_default).
+# create_all не меняет существующие таблицы, поэтому DEFAULT выставляется явно, иначе INSERT без значения
+# нарушит NOT NULL в базах, созданных до переноса значений по умолчанию в БД.
+SERVER_DEFAULTS_DDL = tuple(
+    f"ALTER TABLE {column.table.name} ALTER COLUMN {column.name} SET DEFAULT '{column.server_default.arg}'"
+    for column in (Special_Equipment_Category.__table__.c.path_image, CompanyContact.__table__.c.image_url)
+)
+
+# Индексы, добавленные в модели после создания таблиц: create_all пропускает существующие таблицы
+# вместе с их индексами, поэтому в уже развернутых базах они создаются здесь.
+INDEXES_DDL = (
+    "CREATE INDEX IF NOT EXISTS idx_rental_history_start_day "
+    "ON equipment_rental_histories (date_trunc('day', start_date))",
+    "CREATE INDEX IF NOT EXISTS idx_payment_created_day ON payment_transactions (date_trunc('day', created_at))",
+    "CREATE INDEX IF NOT EXISTS idx_payment_transaction_id_hash ON payment_transactions USING hash (transaction_id)",
+)
+
 
 async def init_db():
     logger.debug("Начало инициализации таблиц в базе данных")
     try:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            for statement in SERVER_DEFAULTS_DDL + AGREE_POLICYS_DDL + INDEXES_DDL + COMPANY_CONTACTS_NOTIFY_DDL:
+                await conn.execute(text(statement))
         logger.debug("Таблицы успешно созданы")
     except Exception as e:
         logger.error(f"Ошибка при создании таблиц: {str(e)}")
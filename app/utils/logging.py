@@ -1,7 +1,13 @@
 import colorlog
 import logging
+from contextvars import ContextVar
 from pathlib import Path
 
+# Логгер обработчика, через который пришло текущее обновление. Устанавливается middleware
+# обработчиков и читается как REQUEST_LOGGER.get(logger) с логгером модуля по умолчанию;
+# фоновые задачи, созданные из обработчика, наследуют значение вместе с контекстом.
+REQUEST_LOGGER: ContextVar[logging.Logger] = ContextVar("request_logger")
+
 
 def setup_logging():
     """Настройка цветного логирования для консоли и записи в файл."""
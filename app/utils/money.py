@@ -0,0 +1,19 @@
+from decimal import Decimal
+
+KOPECKS_PER_RUBLE = 100
+
+
+def to_kopecks(amount: Decimal) -> int:
+    """Переводит сумму в рублях (Decimal из БД) в целое число копеек."""
+    return int(amount * KOPECKS_PER_RUBLE)
+
+
+def from_kopecks(kopecks: int) -> Decimal:
+    """Переводит целое число копеек в сумму в рублях без промежуточного float."""
+    return Decimal(kopecks).scaleb(-2)
+
+
+def format_kopecks(kopecks: int) -> str:
+    """Форматирует сумму в копейках для вывода пользователю (например, 150050 -> '1500.50')."""
+    rubles, rest = divmod(kopecks, KOPECKS_PER_RUBLE)
+    return f"{rubles}.{rest:02d}"
@@ -0,0 +1,23 @@
+from typing import Any
+
+import orjson
+
+
+def _default(obj: Any) -> str:
+    """Типы, которые orjson не сериализует сам (Decimal, HttpUrl), выводятся строкой."""
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """Сериализует объект в JSON (bytes) через orjson."""
+    return orjson.dumps(obj, default=_default)
+
+
+def dumps_str(obj: Any) -> str:
+    """Сериализует объект в JSON-строку (для API, ожидающих str)."""
+    return dumps(obj).decode()
+
+
+def loads(data: bytes | str) -> Any:
+    """Разбирает JSON через orjson."""
+    return orjson.loads(data)
@@ -44,8 +44,7 @@ async def generate_default_equipment(session: AsyncSession) -> None:
             )
             default_equipment.append(equipment_data)
 
-    for equipment in default_equipment:
-        await equipment_dao.add(equipment)
+    await equipment_dao.add_many(default_equipment)
 
     await session.commit()
     logger.debug(f"Сгенерировано {len(default_equipment)} записей в таблице special_equipments")
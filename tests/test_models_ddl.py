@@ -0,0 +1,27 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.handlers.models import Special_Equipment_Category, CompanyContact
+from app.utils.create_table_db import SERVER_DEFAULTS_DDL
+
+
+def _create_table_sql(model) -> str:
+    return str(CreateTable(model.__table__).compile(dialect=postgresql.dialect()))
+
+
+def test_category_path_image_has_server_default():
+    assert "path_image VARCHAR(255) DEFAULT 'https://iimg.su/i/Tx3v8r' NOT NULL" in _create_table_sql(
+        Special_Equipment_Category
+    )
+
+
+def test_company_contact_image_url_has_server_default():
+    assert "image_url VARCHAR(255) DEFAULT 'https://iimg.su/i/7vTQV5' NOT NULL" in _create_table_sql(CompanyContact)
+
+
+def test_server_defaults_ddl_covers_existing_tables():
+    assert SERVER_DEFAULTS_DDL == (
+        "ALTER TABLE special_equipment_categories ALTER COLUMN path_image SET DEFAULT 'https://iimg.su/i/Tx3v8r'",
+        "ALTER TABLE company_contacts ALTER COLUMN image_url SET DEFAULT 'https://iimg.su/i/7vTQV5'",
+    )
+